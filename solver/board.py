@@ -1,4 +1,5 @@
 import copy
+import random
 import matplotlib.pyplot as plt
 import numpy as np
 import heapq
@@ -18,6 +19,14 @@ color_abbreviation = {
         '*': 'black'
 }
 
+# Move that undoes each move of the black block
+inverse_moves = {
+    'up': 'down',
+    'down': 'up',
+    'left': 'right',
+    'right': 'left'
+}
+
 def flatten(lst):
     return [item for sublist in lst for item in sublist]
 
@@ -128,6 +137,16 @@ def display_goal_state(goal_state):
     plt.axis('off')
     plt.savefig(path+'/data/images/goal_image.png')  # Save the image to a file
 
+# Random 64-bit key for every (row, column, color), the board hash is the XOR of the keys
+# of its cells so a move updates it with the keys of the two swapped cells
+zobrist_random = random.Random(0)
+zobrist_keys = {}
+
+def get_zobrist_key(i, j, color):
+    if (i, j, color) not in zobrist_keys:
+        zobrist_keys[(i, j, color)] = zobrist_random.getrandbits(64)
+    return zobrist_keys[(i, j, color)]
+
 class Puzzle:
     def __init__(self, n, goal, puzzle):
         self.size = n
@@ -136,8 +155,15 @@ class Puzzle:
         self.black_row, self.black_col = self.find_black_block()
         self.path_cost = 0
 
+        # Cached values, updated by applyMove from the two cells it swaps
+        self.board_hash = 0
+        for i in range(self.size):
+            for j in range(self.size):
+                self.board_hash ^= get_zobrist_key(i, j, self.puzzle[i][j])
+        self.heuristic_value = self.numberOfMisplacedHeuristic()
+
     def __hash__(self):
-        return hash(tuple(map(tuple, self.puzzle)))
+        return self.board_hash
     def __eq__(self, other):
         return isinstance(other, Puzzle) and self.puzzle == other.puzzle
     def find_black_block(self):
@@ -145,26 +171,41 @@ class Puzzle:
             for j in range(self.size):
                 if self.puzzle[i][j] == 'black':
                     return i, j
+
+    # 1 when the cell is an internal cell holding its goal color (the black block never counts)
+    def cell_matches(self, i, j):
+        if i < 1 or i > self.size - 2 or j < 1 or j > self.size - 2:
+            return 0
+        color = self.puzzle[i][j]
+        return 1 if color != 'black' and color == self.goal_state[i - 1][j - 1] else 0
+
+    # Swaps the black block with the cell (i, j), keeping the cached values up to date
+    def move_black_block(self, i, j):
+        black_row, black_col = self.black_row, self.black_col
+        color = self.puzzle[i][j]
+        self.heuristic_value += self.cell_matches(i, j) + self.cell_matches(black_row, black_col)
+        self.board_hash ^= get_zobrist_key(i, j, color) ^ get_zobrist_key(i, j, 'black') \
+            ^ get_zobrist_key(black_row, black_col, 'black') ^ get_zobrist_key(black_row, black_col, color)
+        self.puzzle[black_row][black_col], self.puzzle[i][j] = color, 'black'
+        self.black_row, self.black_col = i, j
+        self.heuristic_value -= self.cell_matches(i, j) + self.cell_matches(black_row, black_col)
                 
     def applyMove(self, m):
         if m == 'right' and self.black_col > 0:
-            self.puzzle[self.black_row][self.black_col], self.puzzle[self.black_row][self.black_col - 1] = \
-            self.puzzle[self.black_row][self.black_col - 1], self.puzzle[self.black_row][self.black_col]
-            self.black_col -= 1
+            self.move_black_block(self.black_row, self.black_col - 1)
         elif m == 'left' and self.black_col < self.size - 1:
-            self.puzzle[self.black_row][self.black_col], self.puzzle[self.black_row][self.black_col + 1] = \
-            self.puzzle[self.black_row][self.black_col + 1], self.puzzle[self.black_row][self.black_col]
-            self.black_col += 1
+            self.move_black_block(self.black_row, self.black_col + 1)
         elif m == 'down' and self.black_row > 0:
-            self.puzzle[self.black_row][self.black_col], self.puzzle[self.black_row - 1][self.black_col] = \
-            self.puzzle[self.black_row - 1][self.black_col], self.puzzle[self.black_row][self.black_col]
-            self.black_row -= 1
+            self.move_black_block(self.black_row - 1, self.black_col)
         elif m == 'up' and self.black_row < self.size - 1:
-            self.puzzle[self.black_row][self.black_col], self.puzzle[self.black_row + 1][self.black_col] = \
-            self.puzzle[self.black_row + 1][self.black_col], self.puzzle[self.black_row][self.black_col]
-            self.black_row += 1
+            self.move_black_block(self.black_row + 1, self.black_col)
         self.path_cost += 1
 
+    # Reverts applyMove(m) in place
+    def undoMove(self, m):
+        self.applyMove(inverse_moves[m])
+        self.path_cost -= 2
+
     def is_goal_state(self):
         for i in range(1, self.size - 1):
             for j in range(1, self.size - 1):
@@ -175,23 +216,21 @@ class Puzzle:
     def copy(self):
         return copy.deepcopy(self)
     
+    # Moves applyMove can perform from the current black block position
     def get_possible_moves(self):
         possible_moves = []
-        for i in range(self.size):
-            for j in range(self.size):
-                if self.puzzle[i][j] == 'black':
-                    if i > 0:
-                        possible_moves.append("up")
-                    if i < self.size - 1:
-                        possible_moves.append("down")
-                    if j > 0:
-                        possible_moves.append("left")
-                    if j < self.size - 1:
-                        possible_moves.append("right")
+        if self.black_row < self.size - 1:
+            possible_moves.append("up")
+        if self.black_row > 0:
+            possible_moves.append("down")
+        if self.black_col < self.size - 1:
+            possible_moves.append("left")
+        if self.black_col > 0:
+            possible_moves.append("right")
         return possible_moves
     
     def __lt__(self, other):
-        return (self.path_cost + self.numberOfMisplacedHeuristic()) < (other.path_cost + other.numberOfMisplacedHeuristic())
+        return (self.path_cost + self.heuristic_value) < (other.path_cost + other.heuristic_value)
     
     def numberOfMisplacedHeuristic(self):
         heuristic_value = (self.size - 2) * (self.size - 2)
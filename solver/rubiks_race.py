@@ -1,4 +1,5 @@
 import heapq
+import random
 from termcolor import colored
 from random import choice
 from collections import Counter
@@ -23,12 +24,13 @@ color_abbreviation = {
 
 # Class to represent the state of the 8-puzzle
 class PuzzleState:
-    def __init__(self, board, parent, move, depth, cost):
+    def __init__(self, board, parent, move, depth, cost, board_hash=None):
         self.board = board  # The puzzle board configuration
         self.parent = parent  # Parent state
         self.move = move  # Move to reach this state
         self.depth = depth  # Depth in the search tree
         self.cost = cost  # Cost (depth + heuristic)
+        self.board_hash = get_board_hash(board) if board_hash is None else board_hash  # Zobrist hash of the board
 
     def __lt__(self, other):
         return self.cost < other.cost
@@ -137,6 +139,23 @@ def heuristic(board):
                     total_distance += 1
     return total_distance
 
+# Random 64-bit key for every (cell, color), the board hash is the XOR of the keys of its cells
+# so a move updates it with the keys of the two swapped cells instead of hashing the whole board
+zobrist_random = random.Random(0)
+zobrist_keys = [{color: zobrist_random.getrandbits(64) for color in color_abbreviation} for _ in range(25)]
+
+def get_board_hash(board):
+    board_hash = 0
+    for i, color in enumerate(board):
+        board_hash ^= zobrist_keys[i][color]
+    return board_hash
+
+# Hash of the board after the blank at blank_pos is swapped with the tile at new_blank_pos
+def update_board_hash(board_hash, board, blank_pos, new_blank_pos):
+    color = board[new_blank_pos]
+    return board_hash ^ zobrist_keys[blank_pos]['*'] ^ zobrist_keys[blank_pos][color] \
+        ^ zobrist_keys[new_blank_pos][color] ^ zobrist_keys[new_blank_pos]['*']
+
 # Function to get the new state after a move
 def move_tile(board, move, blank_pos):
     new_board = board[:]
@@ -147,7 +166,7 @@ def move_tile(board, move, blank_pos):
 # A* search algorithm
 def a_star(start_state, goal_state):
     open_list = []
-    closed_list = set()
+    closed_list = set()  # Zobrist hashes of the expanded boards
     heapq.heappush(open_list, PuzzleState(start_state, None, None, 0, heuristic(start_state)))
 
     while open_list:
@@ -157,7 +176,7 @@ def a_star(start_state, goal_state):
         if current_state_goal_positions == goal_state:
             return current_state
         
-        closed_list.add(tuple(current_state.board))
+        closed_list.add(current_state.board_hash)
 
         blank_pos = current_state.board.index("*")
 
@@ -170,11 +189,11 @@ def a_star(start_state, goal_state):
                 continue
             if move == 'L' and blank_pos % 5 == 4:  # Invalid move right
                 continue
-            new_board = move_tile(current_state.board, move, blank_pos)
-
-            if tuple(new_board) in closed_list:
+            new_hash = update_board_hash(current_state.board_hash, current_state.board, blank_pos, blank_pos + moves[move])
+            if new_hash in closed_list:
                 continue
-            new_state = PuzzleState(new_board, current_state, move, current_state.depth + 1, current_state.depth + 1 + heuristic(new_board))
+            new_board = move_tile(current_state.board, move, blank_pos)
+            new_state = PuzzleState(new_board, current_state, move, current_state.depth + 1, current_state.depth + 1 + heuristic(new_board), new_hash)
             heapq.heappush(open_list, new_state)
 
     return None
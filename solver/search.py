@@ -1,54 +1,61 @@
-from board import display_grid
-import heapq
-from collections import deque
+from board import display_grid, inverse_moves
 
 class IDA:
     def __init__(self, initial_state, n):
         self._n = n
         self.initial_state = initial_state
         self.threshold = None
-        self.pruned = None
+        self.next_threshold = None
+        self.path = None
 
     def searchNumMisplacedTiles(self):
-        self.pruned = deque()
-        self.threshold = self.initial_state.path_cost + self.initial_state.numberOfMisplacedHeuristic()
-        #heapq.heappush(self.pruned, (self.initial_state.path_cost + self.initial_state.numberOfMisplacedHeuristic(), self.initial_state))
-        self.pruned.append((self.initial_state.path_cost + self.initial_state.numberOfMisplacedHeuristic(), self.initial_state))
+        self.path = []
+        self.threshold = self.initial_state.path_cost + self.initial_state.heuristic_value
         print(f"Initial threshold: {self.threshold}")
         c = 0
         while True:
             c += 1
             print(f"ITERATION: {c}")
+            # Smallest f over the threshold seen in this iteration
+            self.next_threshold = float('inf')
             result = self.NumMisplacedTiles_search_depth(self.initial_state, self.initial_state.path_cost)
             if result:
                 print("Goal state reached!")
                 return result
 
-            else:
-                
-                self.threshold = max(self.pruned)[0]
-                self.pruned.remove(max(self.pruned))
-                print(f"Threshold: {self.threshold}")
+            if self.next_threshold == float('inf'):
+                print("No solution found")
+                return None
+            self.threshold = self.next_threshold
+            print(f"Threshold: {self.threshold}")
 
+    # Depth first search that moves the single puzzle in place and undoes every move on the
+    # way back. On success the puzzle is left on the goal state and self.path holds the moves
     def NumMisplacedTiles_search_depth(self, current_state, g):
-        f = g + current_state.numberOfMisplacedHeuristic()
+        f = g + current_state.heuristic_value
 
         if f > self.threshold:
-            #heapq.heappush(self.pruned, (current_state.path_cost + current_state.numberOfMisplacedHeuristic(), current_state))
-            self.pruned.append((current_state.path_cost + current_state.numberOfMisplacedHeuristic(), current_state))
-
+            if f < self.next_threshold:
+                self.next_threshold = f
             return None
 
         if current_state.is_goal_state():
             return current_state
 
         for move in current_state.get_possible_moves():
-            new_state = current_state.copy()
-            new_state.applyMove(move)
+            # Going straight back to the previous state never helps
+            if self.path and move == inverse_moves[self.path[-1]]:
+                continue
+
+            current_state.applyMove(move)
+            self.path.append(move)
 
-            child_result = self.NumMisplacedTiles_search_depth(new_state, g + 1)
+            child_result = self.NumMisplacedTiles_search_depth(current_state, g + 1)
 
             if child_result:
                 return child_result
 
-        return None
\ No newline at end of file
+            self.path.pop()
+            current_state.undoMove(move)
+
+        return None
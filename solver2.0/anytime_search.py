@@ -0,0 +1,137 @@
+import time
+from open_list import BucketOpenList
+from node_pool import NodePool, NO_PARENT
+from stats import TimedOpenList
+
+""" Anytime weighted A* (restarting weighted A*).
+
+The first search orders nodes by g + w * h with a high weight w, which finds a solution fast.
+Every following search lowers the weight and prunes the nodes that cannot beat the best
+solution so far (g + h >= its cost), until the weight reaches 1 or the deadline passes.
+Every improved solution is reported with its suboptimality bound: the solution cost over the
+lowest g + h left in the open list, never more than the weight.
+
+Both the pruning and the bound rely on an admissible heuristic. With any other heuristic every
+search runs to its first goal without pruning, only solutions shorter than the best one are
+reported, and they are reported without a bound (None). """
+
+# Weights are used in hundredths so f stays an integer for the bucketed open list
+WEIGHT_SCALE = 100
+
+# Expansions between two checks of the deadline
+EXPANSIONS_PER_DEADLINE_CHECK = 256
+
+class DeadlineReached(Exception):
+    pass
+
+class AnytimeWeightedAStar:
+    def __init__(self, graph, heuristic, admissible, deadline, tie_breaking, on_solution, stats):
+        self.graph = graph
+        self.heuristic = heuristic
+        self.admissible = admissible
+        self.deadline = deadline
+        self.tie_breaking = tie_breaking
+        self.on_solution = on_solution
+        self.goal_matched = len(graph.internal_matrix_index)
+        self.best_solution = None
+        self.best_cost = float('inf')
+        self.best_bound = float('inf')
+        self.stats = stats
+
+    # Weighted A* bounded by the incumbent. Returns (goal node, nodes, open list) or
+    # (None, nodes, None) when the space under the incumbent is exhausted
+    def weighted_search(self, weight_units):
+        graph = self.graph
+        stats = self.stats
+        stats.iterations += 1
+        open_list = BucketOpenList(self.tie_breaking)
+        expand_key = graph.expand_key
+        if stats.profile:
+            open_list = TimedOpenList(open_list, stats)
+            expand_key = stats.time_expansion(expand_key)
+        nodes = NodePool(graph.n)
+        best_node = {}
+        start_state = graph.create_initial_state(self.heuristic)
+        start = nodes.add(start_state.key, NO_PARENT, None, 0, start_state.h, start_state.blank_pos, start_state.matched)
+        open_list.push(start, weight_units * start_state.h, 0, start_state.h)
+        best_node[start_state.key] = start
+        expansions = 0
+        # Nodes that cannot beat the incumbent, only known with an admissible heuristic
+        best_cost = self.best_cost if self.admissible else float('inf')
+
+        # The closed table size is recorded however the search ends, the deadline included
+        try:
+            while open_list:
+                if len(open_list) > stats.peak_open:
+                    stats.peak_open = len(open_list)
+                current = open_list.pop()
+                key = nodes.keys[current]
+                if best_node[key] != current:
+                    stats.stale_dropped += 1
+                    continue
+                g = nodes.g[current]
+                h = nodes.f[current] - g
+                if g + h >= best_cost:
+                    continue
+
+                if nodes.matched[current] == self.goal_matched:
+                    return current, nodes, open_list
+
+                expansions += 1
+                if expansions % EXPANSIONS_PER_DEADLINE_CHECK == 0 and self.deadline is not None and time.monotonic() >= self.deadline:
+                    raise DeadlineReached()
+
+                stats.nodes_expanded += 1
+                if stats.nodes_expanded >= stats.next_progress:
+                    stats.progress()
+                depth = g + 1
+                for move, new_board, new_blank_pos, child_h, matched in expand_key(key, nodes.blank_positions[current], h, nodes.matched[current], self.heuristic):
+                    stats.nodes_generated += 1
+                    if depth + child_h >= best_cost:
+                        continue
+                    previous = best_node.get(new_board)
+                    if previous is not None and nodes.g[previous] <= depth:
+                        stats.duplicates_pruned += 1
+                        continue
+                    child = nodes.add(new_board, current, move, depth, depth + child_h, new_blank_pos, matched)
+                    best_node[new_board] = child
+                    open_list.push(child, WEIGHT_SCALE * depth + weight_units * child_h, depth, child_h)
+        finally:
+            stats.peak_closed = max(stats.peak_closed, len(best_node))
+        return None, nodes, None
+
+    def search(self, initial_weight, weight_step):
+        weight_units = max(WEIGHT_SCALE, round(initial_weight * WEIGHT_SCALE))
+        step_units = max(1, round(weight_step * WEIGHT_SCALE))
+        try:
+            while True:
+                goal, nodes, open_list = self.weighted_search(weight_units)
+                if goal is None:
+                    # Nothing left under the incumbent: it is optimal (only reached with an
+                    # admissible heuristic, any other one searches until a goal or no solution)
+                    if self.admissible and self.best_solution is not None and self.best_bound > 1:
+                        self.report(self.best_solution, self.best_cost, 1.0)
+                    return self.best_solution
+
+                cost = nodes.g[goal]
+                if self.admissible:
+                    lower_bound = cost
+                    for index in open_list:
+                        lower_bound = min(lower_bound, nodes.f[index])
+                    bound = min(weight_units / WEIGHT_SCALE, cost / lower_bound if lower_bound else 1.0)
+                    self.report(nodes.build_state(goal), cost, bound)
+                elif cost < self.best_cost:
+                    self.report(nodes.build_state(goal), cost, None)
+
+                if weight_units == WEIGHT_SCALE:
+                    return self.best_solution
+                weight_units = max(WEIGHT_SCALE, weight_units - step_units)
+        except DeadlineReached:
+            return self.best_solution
+
+    def report(self, solution, cost, bound):
+        self.best_solution = solution
+        self.best_cost = cost
+        self.best_bound = bound
+        if self.on_solution is not None:
+            self.on_solution(solution, bound)
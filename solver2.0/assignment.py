@@ -0,0 +1,56 @@
+""" Minimum cost assignment (Hungarian algorithm) used by the assignment heuristic. """
+
+INFINITY = float('inf')
+
+# Returns the minimum total cost of assigning every row to a distinct column.
+# cost is a list of rows, all of the same length, with no more rows than columns
+def min_cost_assignment(cost):
+    rows = len(cost)
+    if rows == 0:
+        return 0
+    columns = len(cost[0])
+    if rows > columns:
+        raise ValueError(f'Cannot assign {rows} rows to {columns} columns')
+
+    # Potentials and matching are 1-indexed, column 0 is a virtual column
+    row_potential = [0] * (rows + 1)
+    column_potential = [0] * (columns + 1)
+    column_match = [0] * (columns + 1)
+    previous_column = [0] * (columns + 1)
+
+    for row in range(1, rows + 1):
+        column_match[0] = row
+        current_column = 0
+        min_slack = [INFINITY] * (columns + 1)
+        used = [False] * (columns + 1)
+        while True:
+            used[current_column] = True
+            current_row = column_match[current_column]
+            delta = INFINITY
+            next_column = 0
+            for column in range(1, columns + 1):
+                if used[column]:
+                    continue
+                slack = cost[current_row - 1][column - 1] - row_potential[current_row] - column_potential[column]
+                if slack < min_slack[column]:
+                    min_slack[column] = slack
+                    previous_column[column] = current_column
+                if min_slack[column] < delta:
+                    delta = min_slack[column]
+                    next_column = column
+            for column in range(columns + 1):
+                if used[column]:
+                    row_potential[column_match[column]] += delta
+                    column_potential[column] -= delta
+                else:
+                    min_slack[column] -= delta
+            current_column = next_column
+            if column_match[current_column] == 0:
+                break
+        # Augment along the alternating path
+        while current_column:
+            column = previous_column[current_column]
+            column_match[current_column] = column_match[column]
+            current_column = column
+
+    return sum(cost[column_match[column] - 1][column - 1] for column in range(1, columns + 1) if column_match[column])
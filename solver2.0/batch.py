@@ -0,0 +1,228 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import signal
+import sqlite3
+import sys
+import time
+from board import validate_file_state, flatten
+from reader import read_input_file, parse_state_line
+from informed_search import AStarSearchGraph, SERIAL_SEARCHES, HEURISTICS
+from solution_cache import SolutionCache, DEFAULT_MAX_ENTRIES
+
+""" Batch solver: sends many initial/goal pairs to a pool of worker processes and streams the
+results as JSON Lines as they finish.
+
+Instances come either from a directory, where every '<name>inicial.txt' is paired with the
+'<name>meta.txt' next to it, or from a JSON Lines manifest with one object per instance:
+{"initial": path, "goal": path, "name": ..., "time_limit": seconds, "memory_limit": MB,
+"algorithm": ..., "heuristic": ...} (only initial and goal are required, the rest override the
+command line options and relative paths are resolved from the manifest directory).
+
+With a cache file every worker looks the instances up in a shared SolutionCache before searching
+and stores the solutions it finds. """
+
+# Searches run inside a worker process (the parallel searches would need processes of their own)
+ALGORITHMS = SERIAL_SEARCHES
+
+# anytime_a_star stops at its own deadline with the best solution found so far, so its interval
+# timer only fires this many seconds later, as a backstop
+ANYTIME_TIMER_MARGIN = 1.0
+
+# Number of goals whose warm AStarSearchGraph is kept by every worker
+GRAPH_CACHE_SIZE = 16
+
+class SolveTimeout(Exception):
+    pass
+
+def find_directory_instances(directory):
+    instances = []
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith('inicial.txt'):
+            continue
+        prefix = file_name[:-len('inicial.txt')]
+        goal_file = os.path.join(directory, prefix + 'meta.txt')
+        if os.path.exists(goal_file):
+            instances.append({
+                'name': prefix.rstrip('_') or file_name,
+                'initial': os.path.join(directory, file_name),
+                'goal': goal_file
+            })
+    return instances
+
+def read_manifest(manifest):
+    instances = []
+    base_dir = os.path.dirname(os.path.abspath(manifest))
+    with open(manifest, 'r') as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            instance = json.loads(line)
+            instance.setdefault('name', str(line_number))
+            instance['initial'] = os.path.join(base_dir, instance['initial'])
+            instance['goal'] = os.path.join(base_dir, instance['goal'])
+            instances.append(instance)
+    return instances
+
+def load_instances(source):
+    if os.path.isdir(source):
+        return find_directory_instances(source)
+    return read_manifest(source)
+
+# Worker side: every worker keeps warm graphs (goal tables, pattern databases, caches) per goal
+worker_graphs = {}
+worker_options = {}
+
+def handle_alarm(signum, frame):
+    raise SolveTimeout()
+
+def init_worker(algorithm, heuristic, time_limit, memory_limit, cache_path=None, cache_size=DEFAULT_MAX_ENTRIES):
+    worker_options.update(algorithm=algorithm, heuristic=heuristic, time_limit=time_limit, memory_limit=memory_limit)
+    worker_options['cache'] = SolutionCache(cache_path, cache_size) if cache_path else None
+    signal.signal(signal.SIGALRM, handle_alarm)
+
+def get_graph(initial_state, goal_state, n):
+    cache_key = (tuple(goal_state), n)
+    graph = worker_graphs.pop(cache_key, None)
+    if graph is None:
+        graph = AStarSearchGraph(initial_state, goal_state, n)
+    else:
+        graph.set_initial_state(initial_state)
+    # Most recently used goals are kept at the end
+    worker_graphs[cache_key] = graph
+    while len(worker_graphs) > GRAPH_CACHE_SIZE:
+        del worker_graphs[next(iter(worker_graphs))]
+    return graph
+
+# The time limit (seconds) is given to the searches that stop by themselves at a deadline
+def run_search(graph, algorithm, heuristic, time_limit=None):
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f'Invalid algorithm: {algorithm}, must be one of {ALGORITHMS}')
+    options = {'time_limit': time_limit} if algorithm == 'anytime_a_star' else {}
+    result, stats = graph.solve(algorithm, heuristic, **options)
+    return result
+
+def load_file_states(initial_file_state, goal_file_state):
+    validate_file_state(initial_file_state, False)
+    validate_file_state(goal_file_state, True)
+    return flatten(initial_file_state), flatten(goal_file_state), len(initial_file_state)
+
+def load_instance(instance):
+    return load_file_states(read_input_file(instance['initial']), read_input_file(instance['goal']))
+
+# Instance given in the one line form of parse_state_line
+def load_state_line(line):
+    return load_file_states(*parse_state_line(line))
+
+def solve_instance(instance):
+    algorithm = instance.get('algorithm', worker_options['algorithm'])
+    heuristic = instance.get('heuristic', worker_options['heuristic'])
+    time_limit = instance.get('time_limit', worker_options['time_limit'])
+    memory_limit = instance.get('memory_limit', worker_options['memory_limit'])
+    record = {
+        'name': instance['name'],
+        'initial': instance['initial'],
+        'goal': instance['goal'],
+        'algorithm': algorithm,
+        'heuristic': heuristic,
+        'worker': os.getpid()
+    }
+    return solve_record(record, lambda: load_instance(instance), algorithm, heuristic, time_limit, memory_limit, worker_options['cache'])
+
+# Loads an instance with load() and solves it on the warm graph of its goal, filling the record.
+# Limits are applied around a single instance: an interval timer for the time (needs the SIGALRM
+# handler of init_worker) and the address space soft limit for the memory (MB), restored afterwards.
+# Cache hits skip the search, and the solutions found are stored once the limits are lifted
+def solve_record(record, load, algorithm, heuristic, time_limit=None, memory_limit=None, cache=None):
+    soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+    start_time = time.perf_counter()
+    graph = None
+    try:
+        initial_state, goal_state, n = load()
+        graph = get_graph(initial_state, goal_state, n)
+        graph.stats = None
+        result = cache.lookup(graph, algorithm, heuristic) if cache is not None else None
+        if cache is not None:
+            record['cache'] = 'hit' if result is not None else 'miss'
+        if result is None:
+            if memory_limit:
+                resource.setrlimit(resource.RLIMIT_AS, (int(memory_limit * 1024 * 1024), hard_limit))
+            search_start = time.perf_counter()
+            if time_limit:
+                signal.setitimer(signal.ITIMER_REAL, time_limit + (ANYTIME_TIMER_MARGIN if algorithm == 'anytime_a_star' else 0))
+            result = run_search(graph, algorithm, heuristic, time_limit)
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            resource.setrlimit(resource.RLIMIT_AS, (soft_limit, hard_limit))
+            if cache is not None and result is not None:
+                cache.store(graph, algorithm, heuristic, result.get_solution_moves())
+        if result is None:
+            # anytime_a_star returns no solution when its deadline passes before the first one
+            deadline_passed = algorithm == 'anytime_a_star' and time_limit and time.perf_counter() - search_start >= time_limit
+            record['status'] = 'timeout' if deadline_passed else 'no_solution'
+        else:
+            moves = result.get_solution_moves()
+            record['status'] = 'solved'
+            record['moves'] = ''.join(moves)
+            record['length'] = len(moves)
+    except SolveTimeout:
+        record['status'] = 'timeout'
+    except MemoryError:
+        record['status'] = 'memory_limit'
+        # The goal tables of a graph interrupted by the memory limit are not trusted
+        worker_graphs.clear()
+    except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+        record['status'] = 'error'
+        record['error'] = str(e)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        resource.setrlimit(resource.RLIMIT_AS, (soft_limit, hard_limit))
+
+    # Counters of interrupted searches are kept too, up to the point they stopped
+    if graph is not None and graph.stats is not None:
+        record['stats'] = graph.stats.as_dict()
+    record['time'] = time.perf_counter() - start_time
+    record['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return record
+
+def solve_batch(instances, output, algorithm='IDA_star', heuristic='manhattan', workers=None, time_limit=None, memory_limit=None,
+                cache_path=None, cache_size=DEFAULT_MAX_ENTRIES):
+    summary = {'instances': len(instances), 'solved': 0, 'no_solution': 0, 'timeout': 0, 'memory_limit': 0, 'error': 0}
+    if cache_path:
+        summary.update(cache_hits=0, cache_misses=0)
+    start_time = time.perf_counter()
+    initargs = (algorithm, heuristic, time_limit, memory_limit, cache_path, cache_size)
+    with multiprocessing.Pool(workers, initializer=init_worker, initargs=initargs) as pool:
+        for record in pool.imap_unordered(solve_instance, instances):
+            summary[record['status']] += 1
+            if 'cache' in record:
+                summary['cache_hits' if record['cache'] == 'hit' else 'cache_misses'] += 1
+            output.write(json.dumps(record) + '\n')
+            output.flush()
+    summary['time'] = time.perf_counter() - start_time
+    return summary
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Solve many Rubik\'s Race instances in parallel')
+    parser.add_argument('source', help='directory with <name>inicial.txt/<name>meta.txt pairs or a JSON Lines manifest')
+    parser.add_argument('--algorithm', choices=ALGORITHMS, default='IDA_star')
+    parser.add_argument('--heuristic', choices=HEURISTICS, default='manhattan')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: number of CPUs)')
+    parser.add_argument('--time-limit', type=float, default=None, help='seconds per instance')
+    parser.add_argument('--memory-limit', type=float, default=None, help='address space per instance in MB')
+    parser.add_argument('--output', default=None, help='JSON Lines output file (default: stdout)')
+    parser.add_argument('--cache', default=None, help='SQLite solution cache file shared by the workers')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_ENTRIES, help=f'solutions kept in the cache (default: {DEFAULT_MAX_ENTRIES})')
+    args = parser.parse_args()
+
+    instances = load_instances(args.source)
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        summary = solve_batch(instances, output, args.algorithm, args.heuristic, args.workers, args.time_limit, args.memory_limit,
+                              args.cache, args.cache_size)
+    finally:
+        if args.output:
+            output.close()
+    print(json.dumps(summary), file=sys.stderr)
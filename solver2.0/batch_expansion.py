@@ -0,0 +1,178 @@
+import time
+import numpy as np
+from open_list import BucketOpenList
+from stats import TimedOpenList
+from core import get_cell
+
+""" A* with batched, vectorized expansion.
+
+Boards are rows of a 2-D uint8 array (one color code per cell). Every iteration pops a batch of
+nodes of the lowest f, generates all their children at once with fancy indexing and scores
+them with a single gather over the heuristic table and a sum per row, so the Python overhead
+per node is reduced to the duplicate check and the open list push. Only nodes of the lowest f
+are batched together, so the search expands the f values in the order of a_star (only the
+ties within one f are broken differently). Only the table heuristics (see
+AStarSearchGraph.heuristic_tables) can be scored this way, and none of them is admissible, so
+the solutions found are not guaranteed to be optimal. """
+
+# Nodes reserved when the board array has to grow
+INITIAL_CAPACITY = 4096
+
+class BatchedAStar:
+    def __init__(self, graph, heuristic, batch_size, stats):
+        if heuristic not in graph.heuristic_tables:
+            raise ValueError(f'The batched expansion only supports the table heuristics: {tuple(graph.heuristic_tables)}')
+        if batch_size < 1:
+            raise ValueError('batch_size must be at least 1')
+        n = graph.n
+        self.graph = graph
+        self.heuristic = heuristic
+        self.batch_size = batch_size
+        self.cells = n * n
+        self.table = np.array(graph.heuristic_tables[heuristic], dtype=np.int32)
+        self.stats = stats
+
+        # Tile position and move of the up to 4 children of every blank position (-1 if illegal)
+        self.tile_positions = np.full((self.cells, 4), -1, dtype=np.int64)
+        self.move_names = [[None] * 4 for _ in range(self.cells)]
+        for blank_pos, legal_moves in enumerate(graph.legal_moves):
+            for slot, (move, tile_pos) in enumerate(legal_moves):
+                self.tile_positions[blank_pos, slot] = tile_pos
+                self.move_names[blank_pos][slot] = move
+
+        # Goal test over the internal cells
+        self.internal = np.array(graph.internal_matrix_index, dtype=np.int64)
+        self.goal_codes = np.array([graph.goal_cell_codes[index] for index in graph.internal_matrix_index], dtype=np.uint8)
+
+        self.boards = np.zeros((INITIAL_CAPACITY, self.cells), dtype=np.uint8)
+        self.g = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self.blank_positions = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self.parents = []
+        self.moves = []
+        self.size = 0
+
+    # Appends the rows to the node arrays and returns the index of the first one
+    def add_nodes(self, boards, g, blank_positions, parents, moves):
+        count = len(boards)
+        if self.size + count > len(self.boards):
+            capacity = max(2 * len(self.boards), self.size + count)
+            self.boards = np.resize(self.boards, (capacity, self.cells))
+            self.g = np.resize(self.g, capacity)
+            self.blank_positions = np.resize(self.blank_positions, capacity)
+        first = self.size
+        self.boards[first:first + count] = boards
+        self.g[first:first + count] = g
+        self.blank_positions[first:first + count] = blank_positions
+        self.parents.extend(parents)
+        self.moves.extend(moves)
+        self.size += count
+        return first
+
+    # Pops up to batch_size live nodes, all with the lowest f of the open list
+    def pop_batch(self, open_list, best_node):
+        batch = []
+        f = open_list.min_cost()
+        while open_list and len(batch) < self.batch_size and open_list.min_cost() == f:
+            index = open_list.pop()
+            if best_node[self.boards[index].tobytes()] != index:
+                self.stats.stale_dropped += 1
+                continue
+            batch.append(index)
+        return np.array(batch, dtype=np.int64)
+
+    def search(self):
+        graph = self.graph
+        stats = self.stats
+        open_list = BucketOpenList('h')
+        if stats.profile:
+            open_list = TimedOpenList(open_list, stats)
+        best_node = {}  # Board bytes -> index of the node with the lowest g found so far
+
+        start_board = np.array([[get_cell(graph.initial_key, i) for i in range(self.cells)]], dtype=np.uint8)
+        start_h = int(self.table[start_board[0], np.arange(self.cells)].sum())
+        start = self.add_nodes(start_board, [0], [int(np.flatnonzero(start_board[0] == 0)[0])], [-1], [None])
+        best_node[start_board[0].tobytes()] = start
+        open_list.push(start, start_h, 0, start_h)
+        columns = np.arange(self.cells)
+
+        # The closed table size is recorded however the search ends, a timeout included
+        try:
+            while open_list:
+                if len(open_list) > stats.peak_open:
+                    stats.peak_open = len(open_list)
+                batch = self.pop_batch(open_list, best_node)
+                if len(batch) == 0:
+                    continue
+
+                if stats.profile:
+                    start = time.perf_counter()
+                boards = self.boards[batch]
+                goals = np.flatnonzero((boards[:, self.internal] == self.goal_codes).all(axis=1))
+                if len(goals):
+                    return self.build_solution(int(batch[goals[0]]))
+                stats.nodes_expanded += len(batch)
+                if stats.nodes_expanded >= stats.next_progress:
+                    stats.peak_closed = len(best_node)
+                    stats.progress()
+
+                # Every (parent, legal move) pair of the batch becomes a child row
+                blank_positions = self.blank_positions[batch]
+                tile_positions = self.tile_positions[blank_positions]
+                parent_rows, slots = np.nonzero(tile_positions >= 0)
+                child_tiles = tile_positions[parent_rows, slots]
+                child_blanks = blank_positions[parent_rows]
+                children = boards[parent_rows]
+                rows = np.arange(len(children))
+                children[rows, child_blanks] = children[rows, child_tiles]
+                children[rows, child_tiles] = 0
+
+                # Heuristic of the whole batch: one gather over the table and a sum per row
+                if stats.profile:
+                    heuristic_start = time.perf_counter()
+                    stats.expansion_time += heuristic_start - start
+                h = self.table[children, columns].sum(axis=1)
+                if stats.profile:
+                    start = time.perf_counter()
+                    stats.heuristic_time += start - heuristic_start
+                g = self.g[batch][parent_rows] + 1
+                stats.nodes_generated += len(children)
+
+                # Duplicate detection against the best g found so far, per child
+                batch_rows = {}  # Board bytes -> row of the child kept for it in this batch
+                child_g = g.tolist()
+                for row in range(len(children)):
+                    board_key = children[row].tobytes()
+                    previous = best_node.get(board_key)
+                    if previous is not None and self.g[previous] <= child_g[row]:
+                        stats.duplicates_pruned += 1
+                        continue
+                    # A board generated twice in the same batch is added once, with its lowest g
+                    kept = batch_rows.get(board_key)
+                    if kept is not None and child_g[kept] <= child_g[row]:
+                        stats.duplicates_pruned += 1
+                        continue
+                    batch_rows[board_key] = row
+                if stats.profile:
+                    stats.expansion_time += time.perf_counter() - start
+                if not batch_rows:
+                    continue
+
+                keys = list(batch_rows)
+                keep = np.array(list(batch_rows.values()), dtype=np.int64)
+                parents = batch[parent_rows[keep]].tolist()
+                moves = [self.move_names[blank][slot] for blank, slot in zip(child_blanks[keep].tolist(), slots[keep].tolist())]
+                first = self.add_nodes(children[keep], g[keep], child_tiles[keep], parents, moves)
+                for offset, (board_key, depth, child_h) in enumerate(zip(keys, g[keep].tolist(), h[keep].tolist())):
+                    best_node[board_key] = first + offset
+                    open_list.push(first + offset, depth + child_h, depth, child_h)
+        finally:
+            stats.peak_closed = len(best_node)
+        return None
+
+    def build_solution(self, index):
+        moves = []
+        while self.parents[index] != -1:
+            moves.append(self.moves[index])
+            index = self.parents[index]
+        moves.reverse()
+        return self.graph.replay_moves(moves, self.heuristic)
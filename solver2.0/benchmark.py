@@ -0,0 +1,401 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from board import generate_random_state, move_away, getGoalState
+
+""" Benchmark suite: solves a reproducible set of generated instances with every search mode
+and heuristic of AStarSearchGraph, plus the legacy solvers, and compares runs.
+
+    python benchmark.py run --output baseline.json
+    python benchmark.py run --output current.json
+    python benchmark.py compare baseline.json current.json
+    python benchmark.py imports
+
+Instances are built with generate_random_state and scrambled by move_away, seeded from the
+seed, the size, the scramble depth and the instance number, so the same options always give
+the same instances. The scramble is a random walk of the blank, so the scramble depth is only an
+upper bound of the solution length (80 random moves give solutions of about 15 moves). Every run
+happens in a process of its own, which gives it a clean peak RSS, lets it be killed at the time
+limit and keeps the legacy solvers (with their own board and reader modules) apart. The pattern
+databases of the instance goals are built once, before any run, in a directory of the benchmark
+(a temporary one unless given), and the runs only load them, outside of the timed search. Files
+written for the runs live in a temporary work directory removed at the end, even for the runs
+killed at the time limit.
+
+The import time of the solver modules is measured too, each in a fresh interpreter, and checked
+against IMPORT_TIME_BUDGET: short lived solver processes pay for it on every start. """
+
+SEARCH_MODES = ('a_star', 'a_star_batched', 'IDA_star', 'parallel_IDA_star', 'hda_star', 'sma_star', 'anytime_a_star')
+HEURISTICS = ('manhattan', 'missplaced', 'pattern_database', 'assignment')
+LEGACY_SOLVERS = ('legacy_IDA', 'legacy_a_star')
+
+# Worker processes of the parallel searches, fixed so runs on machines with other CPU counts compare
+PARALLEL_WORKERS = 4
+
+# Options of the search modes that need one
+SEARCH_OPTIONS = {
+    'sma_star': {'max_nodes': 1_000_000},
+    'parallel_IDA_star': {'workers': PARALLEL_WORKERS},
+    'hda_star': {'workers': PARALLEL_WORKERS}
+}
+
+# Searches whose expansions change from run to run: how far the workers get before the goal is
+# found (or termination is detected) depends on their scheduling
+NONDETERMINISTIC_SEARCHES = ('parallel_IDA_star', 'hda_star')
+
+# Heuristics the batched expansion can score
+BATCHED_HEURISTICS = ('manhattan', 'missplaced')
+
+SOLVER_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+LEGACY_DIRECTORY = os.path.abspath(os.path.join(SOLVER_DIRECTORY, os.path.pardir, 'solver'))
+
+# Modules imported by the solver processes, the seconds each may take to import (best of
+# IMPORT_REPEATS fresh interpreters) and the modules they must not import
+IMPORT_MODULES = ('core', 'informed_search', 'main')
+IMPORT_TIME_BUDGET = 0.1
+IMPORT_REPEATS = 5
+HEAVY_MODULES = ('matplotlib', 'numpy', 'termcolor', 'multiprocessing', 'sqlite3')
+
+# Run by a fresh interpreter: import time of a module and the heavy modules loaded with it
+IMPORT_SCRIPT = '''import importlib, json, sys, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - start
+print(json.dumps({'time': elapsed, 'heavy_modules': [name for name in json.loads(sys.argv[2]) if name in sys.modules]}))'''
+
+# Default thresholds of compare: relative increase of the time (ignored under MIN_TIME seconds)
+# and of the expansions (of the deterministic and of the NONDETERMINISTIC_SEARCHES) and peak RSS
+TIME_TOLERANCE = 0.25
+EXPANSIONS_TOLERANCE = 0.0
+PARALLEL_EXPANSIONS_TOLERANCE = 0.25
+RSS_TOLERANCE = 0.25
+MIN_TIME = 0.05
+
+def generate_instances(sizes, depths, count, seed):
+    instances = []
+    for n in sizes:
+        if (n * n - 1) % 6 != 0:
+            raise ValueError(f'Invalid size {n}: the {n * n - 1} tiles must split evenly into 6 colors')
+        for depth in depths:
+            for index in range(count):
+                random.seed(f'{seed}-{n}-{depth}-{index}')
+                grid = generate_random_state(n)
+                goal_state = getGoalState(grid, n)
+                move_away(grid, n, depth)
+                instances.append({'name': f'n{n}_d{depth}_{index}', 'n': n, 'depth': depth, 'initial': ''.join(grid), 'goal': ''.join(goal_state)})
+    return instances
+
+# (solver, heuristic) pairs run on every instance of size n
+def get_configurations(solvers, heuristics, n):
+    configurations = []
+    for solver in solvers:
+        if solver == 'legacy_IDA':
+            configurations.append((solver, 'missplaced'))
+        elif solver == 'legacy_a_star':
+            # The legacy A* is hard coded for 5x5 boards
+            if n == 5:
+                configurations.append((solver, 'manhattan'))
+        else:
+            for heuristic in heuristics:
+                if solver == 'a_star_batched' and heuristic not in BATCHED_HEURISTICS:
+                    continue
+                configurations.append((solver, heuristic))
+    return configurations
+
+# Builds the pattern databases of the goals of the instances run with that heuristic
+def build_pattern_databases(instances, solvers, heuristics, pattern_database_dir, log=None):
+    from pattern_database import PatternDatabase
+    goals = set()
+    for instance in instances:
+        if ('pattern_database' in heuristics and any(solver in SEARCH_MODES for solver in solvers)
+                and (instance['goal'], instance['n']) not in goals):
+            goals.add((instance['goal'], instance['n']))
+            start_time = time.perf_counter()
+            PatternDatabase(list(instance['goal']), instance['n'], pattern_database_dir).close()
+            if log is not None:
+                print(f"pattern database of {instance['name']} ready in {time.perf_counter() - start_time:.2f}s", file=log, flush=True)
+
+def run_search(instance, solver, heuristic, pattern_database_dir):
+    from informed_search import AStarSearchGraph
+    graph = AStarSearchGraph(list(instance['initial']), list(instance['goal']), instance['n'], pattern_database_dir=pattern_database_dir)
+    # The pattern database is loaded before the timer starts, so it only times the search
+    setup_start = time.perf_counter()
+    if heuristic == 'pattern_database':
+        graph.pattern_database_heuristic(graph.initial_key)
+    setup_time = time.perf_counter() - setup_start
+    start_time = time.perf_counter()
+    result, stats = graph.solve(solver, heuristic, **SEARCH_OPTIONS.get(solver, {}))
+    record = {'time': time.perf_counter() - start_time, 'setup_time': setup_time, 'expanded': stats.nodes_expanded, 'generated': stats.nodes_generated}
+    record['length'] = result.depth if result is not None else None
+    return record
+
+# The legacy modules share their names with the ones of solver2.0, which this process may have
+# imported already, so they are dropped from sys.modules before importing the legacy ones
+def import_legacy_modules():
+    for name in ('board', 'reader', 'search', 'rubiks_race'):
+        sys.modules.pop(name, None)
+    sys.path.insert(0, LEGACY_DIRECTORY)
+
+def run_legacy_IDA(instance):
+    import_legacy_modules()
+    from board import Puzzle, color_abbreviation
+    from search import IDA
+    n = instance['n']
+    grid = [[color_abbreviation[color] for color in instance['initial'][row * n:(row + 1) * n]] for row in range(n)]
+    goal = [[color_abbreviation[color] for color in instance['goal'][row * (n - 2):(row + 1) * (n - 2)]] for row in range(n - 2)]
+    start_time = time.perf_counter()
+    result = IDA(Puzzle(n=n, goal=goal, puzzle=grid), n).searchNumMisplacedTiles()
+    return {'time': time.perf_counter() - start_time, 'expanded': None, 'generated': None,
+            'length': result.path_cost if result is not None else None}
+
+# rubiks_race solves data/inicial.txt and data/meta.txt when imported, so the instance is written
+# there inside a temporary directory used as the root of its reader
+def run_legacy_a_star(instance, work_directory):
+    import_legacy_modules()
+    import reader
+    n = instance['n']
+    with tempfile.TemporaryDirectory(dir=work_directory) as directory:
+        os.makedirs(os.path.join(directory, 'data'))
+        with open(os.path.join(directory, 'data', 'inicial.txt'), 'w') as file:
+            file.write('\n'.join(instance['initial'][row * n:(row + 1) * n] for row in range(n)))
+        with open(os.path.join(directory, 'data', 'meta.txt'), 'w') as file:
+            file.write('\n'.join(instance['goal'][row * (n - 2):(row + 1) * (n - 2)] for row in range(n - 2)))
+        reader.path = directory
+        start_time = time.perf_counter()
+        import rubiks_race
+        elapsed = time.perf_counter() - start_time
+    return {'time': elapsed, 'expanded': None, 'generated': None,
+            'length': rubiks_race.solution.depth if rubiks_race.solution is not None else None}
+
+def run_configuration(instance, solver, heuristic, pattern_database_dir, work_directory, connection):
+    # Own process group, so the worker processes of the parallel searches are killed with the run
+    os.setpgrp()
+    # The legacy solvers print every iteration and step
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        if solver == 'legacy_IDA':
+            record = run_legacy_IDA(instance)
+        elif solver == 'legacy_a_star':
+            record = run_legacy_a_star(instance, work_directory)
+        else:
+            record = run_search(instance, solver, heuristic, pattern_database_dir)
+        record['status'] = 'solved' if record['length'] is not None else 'no_solution'
+    except MemoryError:
+        record = {'status': 'memory_limit'}
+    except Exception as e:
+        record = {'status': 'error', 'error': f'{type(e).__name__}: {e}'}
+    record['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    connection.send(record)
+    connection.close()
+
+# Runs a single configuration in a new process, killed after time_limit seconds
+def run_isolated(instance, solver, heuristic, time_limit, pattern_database_dir, work_directory):
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=run_configuration, args=(instance, solver, heuristic, pattern_database_dir, work_directory, sender))
+    start_time = time.perf_counter()
+    process.start()
+    sender.close()
+    if receiver.poll(time_limit):
+        try:
+            record = receiver.recv()
+        except EOFError:
+            # The process died without sending its record
+            process.join()
+            record = {'status': 'error', 'error': f'exit code {process.exitcode}'}
+    else:
+        record = {'status': 'timeout', 'time': time.perf_counter() - start_time}
+    process.join(timeout=1)
+    if process.is_alive():
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.join()
+    return record
+
+def measure_import(module, repeats=IMPORT_REPEATS):
+    times = []
+    for _ in range(repeats):
+        process = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT, module, json.dumps(HEAVY_MODULES)],
+                                 cwd=SOLVER_DIRECTORY, capture_output=True, text=True, check=True)
+        measure = json.loads(process.stdout)
+        times.append(measure['time'])
+    return {'module': module, 'time': min(times), 'heavy_modules': measure['heavy_modules']}
+
+def measure_imports(modules=IMPORT_MODULES, repeats=IMPORT_REPEATS):
+    return [measure_import(module, repeats) for module in modules]
+
+# Imports over the time budget or loading any of the HEAVY_MODULES: [(module, problems)]
+def check_imports(imports, budget=IMPORT_TIME_BUDGET):
+    failures = []
+    for measure in imports:
+        problems = []
+        if measure['time'] > budget:
+            problems.append(f"import time {measure['time'] * 1000:.1f}ms over the {budget * 1000:.0f}ms budget")
+        if measure['heavy_modules']:
+            problems.append(f"imports {', '.join(measure['heavy_modules'])}")
+        if problems:
+            failures.append((measure['module'], problems))
+    return failures
+
+def print_import_failures(failures):
+    for module, problems in failures:
+        print(f'IMPORT {module}: {", ".join(problems)}')
+
+def run_benchmark(sizes, depths, count, seed, solvers, heuristics, time_limit, log=None, pattern_database_dir=None):
+    instances = generate_instances(sizes, depths, count, seed)
+    work_directory = tempfile.mkdtemp(prefix='benchmark-')
+    if pattern_database_dir is None:
+        pattern_database_dir = os.path.join(work_directory, 'pdb')
+    try:
+        build_pattern_databases(instances, solvers, heuristics, pattern_database_dir, log)
+        return run_instances(instances, sizes, depths, count, seed, solvers, heuristics, time_limit, log, pattern_database_dir, work_directory)
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+def run_instances(instances, sizes, depths, count, seed, solvers, heuristics, time_limit, log, pattern_database_dir, work_directory):
+    imports = measure_imports()
+    if log is not None:
+        for measure in imports:
+            print(json.dumps(measure), file=log, flush=True)
+    runs = []
+    for instance in instances:
+        for solver, heuristic in get_configurations(solvers, heuristics, instance['n']):
+            record = {'instance': instance['name'], 'n': instance['n'], 'depth': instance['depth'], 'solver': solver, 'heuristic': heuristic}
+            record.update(run_isolated(instance, solver, heuristic, time_limit, pattern_database_dir, work_directory))
+            runs.append(record)
+            if log is not None:
+                print(json.dumps(record), file=log, flush=True)
+    return {
+        'meta': {
+            'seed': seed, 'sizes': sizes, 'depths': depths, 'count': count, 'time_limit': time_limit,
+            'python': platform.python_version(), 'machine': platform.machine(), 'cpus': multiprocessing.cpu_count(),
+            'parallel_workers': PARALLEL_WORKERS,
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'instances': instances,
+        'imports': imports,
+        'runs': runs
+    }
+
+def run_key(run):
+    return run['instance'], run['solver'], run['heuristic']
+
+def increased(baseline_value, current_value, tolerance):
+    return baseline_value is not None and current_value is not None and current_value > baseline_value * (1 + tolerance)
+
+# Regressions of the current runs against the baseline runs of the same instances and
+# configurations: a solved instance no longer solved, a longer solution, or more time, expansions
+# or memory than the tolerances allow
+def compare_runs(baseline, current, time_tolerance=TIME_TOLERANCE, expansions_tolerance=EXPANSIONS_TOLERANCE, rss_tolerance=RSS_TOLERANCE,
+                 parallel_expansions_tolerance=PARALLEL_EXPANSIONS_TOLERANCE):
+    # Same options but another generator (or seed) give other instances under the same names
+    baseline_instances = {instance['name']: instance for instance in baseline['instances']}
+    for instance in current['instances']:
+        if instance['name'] in baseline_instances and baseline_instances[instance['name']] != instance:
+            raise ValueError(f"Instance {instance['name']} differs from the baseline, rerun the baseline with the same generator and seed")
+    baseline_runs = {run_key(run): run for run in baseline['runs']}
+    regressions = []
+    compared = 0
+    for run in current['runs']:
+        before = baseline_runs.get(run_key(run))
+        if before is None:
+            continue
+        compared += 1
+        problems = []
+        if before['status'] == 'solved' and run['status'] != 'solved':
+            problems.append(f"status {before['status']} -> {run['status']}")
+        elif before['status'] == 'solved':
+            if increased(before['length'], run['length'], 0):
+                problems.append(f"length {before['length']} -> {run['length']}")
+            if max(before['time'], run['time']) >= MIN_TIME and increased(before['time'], run['time'], time_tolerance):
+                problems.append(f"time {before['time']:.3f}s -> {run['time']:.3f}s")
+            tolerance = parallel_expansions_tolerance if run['solver'] in NONDETERMINISTIC_SEARCHES else expansions_tolerance
+            if increased(before.get('expanded'), run.get('expanded'), tolerance):
+                problems.append(f"expanded {before['expanded']} -> {run['expanded']}")
+            if increased(before.get('peak_rss_kb'), run.get('peak_rss_kb'), rss_tolerance):
+                problems.append(f"peak RSS {before['peak_rss_kb']} -> {run['peak_rss_kb']} KB")
+        if problems:
+            regressions.append((run_key(run), problems))
+    return compared, regressions
+
+def parse_list(text):
+    return [int(value) for value in text.split(',')]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rubik\'s Race solver benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the benchmark and write its results as JSON')
+    run_parser.add_argument('--output', required=True, help='JSON results file')
+    run_parser.add_argument('--sizes', type=parse_list, default=[5], help='comma separated board sizes (default: 5)')
+    run_parser.add_argument('--depths', type=parse_list, default=[20, 40, 80], help='comma separated scramble depths (default: 20,40,80)')
+    run_parser.add_argument('--count', type=int, default=3, help='instances per size and depth (default: 3)')
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--solvers', default=','.join(SEARCH_MODES + LEGACY_SOLVERS), help='comma separated search modes and legacy solvers')
+    run_parser.add_argument('--heuristics', default=','.join(HEURISTICS), help='comma separated heuristics')
+    run_parser.add_argument('--time-limit', type=float, default=60, help='seconds per run (default: 60)')
+    run_parser.add_argument('--pattern-database-dir', default=None, help='directory of the pattern databases, kept between runs (default: a temporary one)')
+
+    compare_parser = commands.add_parser('compare', help='flag the regressions of a run against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--time-tolerance', type=float, default=TIME_TOLERANCE, help='allowed relative time increase')
+    compare_parser.add_argument('--expansions-tolerance', type=float, default=EXPANSIONS_TOLERANCE, help='allowed relative expansions increase')
+    compare_parser.add_argument('--parallel-expansions-tolerance', type=float, default=PARALLEL_EXPANSIONS_TOLERANCE,
+                                help='allowed relative expansions increase of the parallel searches')
+    compare_parser.add_argument('--rss-tolerance', type=float, default=RSS_TOLERANCE, help='allowed relative peak RSS increase')
+    compare_parser.add_argument('--import-budget', type=float, default=IMPORT_TIME_BUDGET, help='seconds allowed to import every solver module')
+
+    imports_parser = commands.add_parser('imports', help='check the import time of the solver modules against the budget')
+    imports_parser.add_argument('--import-budget', type=float, default=IMPORT_TIME_BUDGET, help='seconds allowed to import every solver module')
+    imports_parser.add_argument('--repeats', type=int, default=IMPORT_REPEATS, help='fresh interpreters per module, the best time counts')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        solvers = args.solvers.split(',')
+        heuristics = args.heuristics.split(',')
+        for solver in solvers:
+            if solver not in SEARCH_MODES + LEGACY_SOLVERS:
+                parser.error(f'Invalid solver: {solver}, must be one of {SEARCH_MODES + LEGACY_SOLVERS}')
+        for heuristic in heuristics:
+            if heuristic not in HEURISTICS:
+                parser.error(f'Invalid heuristic: {heuristic}, must be one of {HEURISTICS}')
+        results = run_benchmark(args.sizes, args.depths, args.count, args.seed, solvers, heuristics, args.time_limit, log=sys.stderr,
+                                pattern_database_dir=args.pattern_database_dir)
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=1)
+    elif args.command == 'imports':
+        imports = measure_imports(repeats=args.repeats)
+        for measure in imports:
+            print(f"{measure['module']}: {measure['time'] * 1000:.1f}ms")
+        failures = check_imports(imports, args.import_budget)
+        print_import_failures(failures)
+        sys.exit(1 if failures else 0)
+    else:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        with open(args.current) as file:
+            current = json.load(file)
+        try:
+            compared, regressions = compare_runs(baseline, current, args.time_tolerance, args.expansions_tolerance, args.rss_tolerance,
+                                                 args.parallel_expansions_tolerance)
+        except ValueError as e:
+            parser.exit(2, f'{e}\n')
+        for (instance, solver, heuristic), problems in regressions:
+            print(f'REGRESSION {instance} {solver} {heuristic}: {", ".join(problems)}')
+        # Results written before the import times were measured have none to check
+        failures = check_imports(current.get('imports', []), args.import_budget)
+        print_import_failures(failures)
+        print(f'{compared} runs compared, {len(regressions)} regressions, {len(failures)} imports over budget')
+        sys.exit(1 if regressions or failures else 0)
@@ -1,10 +1,11 @@
 import copy
-import matplotlib.pyplot as plt
-import numpy as np
 import random
-from termcolor import colored
 from reader import read_input_file
 from collections import Counter
+# The search-critical part of the board lives in core, imported from here too by the older callers
+from core import (flatten, get_internal_matrix_index, get_coordinates_from_index, get_index_from_coordinates,
+                  BITS_PER_CELL, CELL_MASK, color_codes, code_colors, encode_board, decode_board, get_cell,
+                  find_blank, PuzzleState)
 
 
 color_abbreviation = {
@@ -17,32 +18,10 @@ color_abbreviation = {
         '*': 'black'
 }
 
-def flatten(lst):
-    return [item for sublist in lst for item in sublist]
-
-def get_internal_matrix_index(n):
-    if n < 3:
-        return []  # No internal matrix for n < 3
-
-    indexs = []
-    for row in range(1, n - 1):
-        for column in range(1, n - 1):
-            index = get_index_from_coordinates(row, column, n)
-            indexs.append(index)
-    return indexs
-
 def get_n_value_from_file(file_name):
     file_state = read_input_file(file_name)
     return len(file_state)
 
-def get_coordinates_from_index(index, n):
-    row = index // n
-    column = index % n
-    return row, column
-
-def get_index_from_coordinates(row, column, n):
-    return row * n + column
-
 def generate_random_state(n):
     total_blocks = n * n
     colors = ['V', 'B', 'R', 'A', 'N', 'Z']
@@ -71,7 +50,10 @@ def generate_random_state(n):
             grid[i] = color
     return grid
 
+# matplotlib and numpy take most of the startup time, so they are only imported to draw
 def display_grid_in_chart(grid, n):
+    import matplotlib.pyplot as plt
+    import numpy as np
     block_size = 50
     border_size = 1
 
@@ -109,64 +91,48 @@ def getGoalState(grid, n):
         return goal_state
     
 def apply_moves_to_black_block(grid, n, moves):
-        for i in range(n * n):
-            if grid[i] == 'black':
-                black_tile = get_coordinates_from_index(i, n)
-                break
-
-        if black_tile is None:
+        if '*' not in grid:
             raise ValueError("Black tile not found in grid")
-        
+        i = grid.index('*')
+        black_tile = get_coordinates_from_index(i, n)
+
         for move in moves:
             if move == 'Left' and black_tile[1] > 0:
                 tile_to_move = get_index_from_coordinates(black_tile[0], black_tile[1] - 1, n)
-                grid[i], grid[tile_to_move] = grid[tile_to_move], grid[i]
                 black_tile = (black_tile[0], black_tile[1] - 1)
             elif move == 'Right' and black_tile[1] < n - 1:
                 tile_to_move = get_index_from_coordinates(black_tile[0], black_tile[1] + 1, n)
-                grid[i], grid[tile_to_move] = grid[tile_to_move], grid[i]
                 black_tile = (black_tile[0], black_tile[1] + 1)
             elif move == 'Up' and black_tile[0] > 0:
                 tile_to_move = get_index_from_coordinates(black_tile[0] - 1, black_tile[1], n)
-                grid[i], grid[tile_to_move] = grid[tile_to_move], grid[i]
                 black_tile = (black_tile[0] - 1, black_tile[1])
             elif move == 'Down' and black_tile[0] < n - 1:
                 tile_to_move = get_index_from_coordinates(black_tile[0] + 1, black_tile[1], n)
-                grid[i], grid[tile_to_move] = grid[tile_to_move], grid[i]
                 black_tile = (black_tile[0] + 1, black_tile[1])
+            else:
+                continue
+            # The black block follows every move, so the next swap starts from its new cell
+            grid[i], grid[tile_to_move] = grid[tile_to_move], grid[i]
+            i = tile_to_move
 
+# Applies num_steps random legal moves of the black block, never moving it straight back
 def move_away(grid, n, num_steps):
-        while num_steps > 0:
-            up = 0
-            right = 0
-
-            while abs(up) + abs(right) != 1:
-                up = random.randint(0, 1)
-                right = random.randint(0, 1)
-
-                if random.random() < 0.5:
-                    up *= -1
-                if random.random() < 0.5:
-                    right *= -1
-
-            for i in range(n * n):
-                if grid[i] == 'black':
-                    black_tile_coords= get_coordinates_from_index(i, n)
-                    break
-            
-            if (black_tile_coords[0]-up < n and black_tile_coords[0] - up > 0) and (black_tile_coords[1] + right < n and black_tile_coords[1] + right > 0):
-                moves = []
-
-                if up == 1:
-                    moves.append('Up')
-                elif up == -1:
-                    moves.append('Down')
-                if right == 1:
-                    moves.append('Right')
-                elif right == -1:
-                    moves.append('Left')
-                apply_moves_to_black_block(grid, n, moves)
-                num_steps -= 1
+        blank = grid.index('*')
+        previous = -1
+        for _ in range(num_steps):
+            row, column = get_coordinates_from_index(blank, n)
+            neighbors = []
+            if row > 0:
+                neighbors.append(blank - n)
+            if row < n - 1:
+                neighbors.append(blank + n)
+            if column > 0:
+                neighbors.append(blank - 1)
+            if column < n - 1:
+                neighbors.append(blank + 1)
+            tile = random.choice([i for i in neighbors if i != previous])
+            grid[blank], grid[tile] = grid[tile], grid[blank]
+            previous, blank = blank, tile
 
 def validate_file_state(file_state, goal, min_size=3):
     # Check it has at least 4 rows and 4 columns
@@ -226,62 +192,3 @@ def generate_goal_state_from_file(file_name, goal=True):
     grid = [[[color for color in row] for row in file_state]]
     goal_state = flatten(flatten(grid))
     return goal_state
-
-# Function to get the new state after a move
-def move_tile(board, move, blank_pos, moves):
-    new_board = board[:]
-    new_blank_pos = blank_pos + moves[move]
-    new_board[blank_pos], new_board[new_blank_pos] = new_board[new_blank_pos], new_board[blank_pos]
-    return new_board
-
-class PuzzleState:
-    def __init__(self, board, n, parent, move, depth, cost):
-        self.board = board  # The puzzle board configuration
-        self.parent = parent  # Parent state
-        self.move = move  # Move to reach this state
-        self.depth = depth  # Depth in the search tree
-        self.cost = cost  # Cost (depth + heuristic)
-        if parent is not None:
-            self.n = parent.n
-            self.internal_matrix_index = parent.internal_matrix_index
-        else:
-            self.n = n
-            self.internal_matrix_index =  get_internal_matrix_index(n)
-
-            
-        # Possible moves for the blank tile (up, down, left, right)
-        self.moves = {
-                        'D': -self.n,  # Move up
-                        'U': self.n,   # Move down
-                        'R': -1,  # Move left
-                        'L': 1    # Move right
-                    }
-
-    def __lt__(self, other):
-        return self.cost < other.cost
-    
-    # Function to display the board in a visually appealing format
-    def print_board(self):
-        print("+" + "---+" * self.n)
-        for row in range(0, self.n * self.n,self.n):
-            row_visual = "|"
-            for tile in self.board[row:row + self.n]:
-                if tile == "*":  # Blank tile
-                    row_visual += f" {colored(' ', 'cyan')} |"
-                else:
-                    row_visual += f" {colored(tile, 'yellow')} |"
-            print(row_visual)
-            print("+" + "---+" * self.n)
-
-    # Function to print the solution path
-    def print_solution(self):
-        path = []
-        current = self
-        while current:
-            path.append(current)
-            current = current.parent
-        path.reverse()  # Para mostrar desde el inicio hasta la meta
-
-        for step in path:
-            print(f"Move: {step.move}")  # Imprime el movimiento que llevó a este estado
-            step.print_board()  # Asegura que se imprime el estado correcto
\ No newline at end of file
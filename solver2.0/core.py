@@ -0,0 +1,147 @@
+import random
+
+""" Dependency-free core of the solver: the bit-packed board encoding, the move arithmetic and
+the PuzzleState search node, used by every search. It only imports the standard library (termcolor
+is only imported when a board is printed), so short lived solver processes start quickly. """
+
+def flatten(lst):
+    return [item for sublist in lst for item in sublist]
+
+def get_internal_matrix_index(n):
+    if n < 3:
+        return []  # No internal matrix for n < 3
+
+    indexs = []
+    for row in range(1, n - 1):
+        for column in range(1, n - 1):
+            index = get_index_from_coordinates(row, column, n)
+            indexs.append(index)
+    return indexs
+
+def get_coordinates_from_index(index, n):
+    row = index // n
+    column = index % n
+    return row, column
+
+def get_index_from_coordinates(row, column, n):
+    return row * n + column
+
+# Bit-packed board encoding: every cell takes BITS_PER_CELL bits of a single int,
+# cell i living at bits [i * BITS_PER_CELL, (i + 1) * BITS_PER_CELL)
+BITS_PER_CELL = 3
+CELL_MASK = (1 << BITS_PER_CELL) - 1
+
+# The blank is 0 so a move only has to add the moved tile to one cell and remove it from the other
+color_codes = {
+        '*': 0,
+        'V': 1,
+        'B': 2,
+        'R': 3,
+        'A': 4,
+        'N': 5,
+        'Z': 6
+}
+
+code_colors = {code: color for color, code in color_codes.items()}
+
+def encode_board(board):
+    key = 0
+    for i, color in enumerate(board):
+        key |= color_codes[color] << (i * BITS_PER_CELL)
+    return key
+
+def decode_board(key, n):
+    return [code_colors[get_cell(key, i)] for i in range(n * n)]
+
+def get_cell(key, index):
+    return (key >> (index * BITS_PER_CELL)) & CELL_MASK
+
+def find_blank(key, n):
+    for i in range(n * n):
+        if get_cell(key, i) == color_codes['*']:
+            return i
+    raise ValueError("Blank tile not found in board")
+
+# Zobrist hashing: a random 64-bit key per (color code, cell), a board hashing to the XOR of the
+# keys of its cells. A move changes two cells, so the hash is updated with four XORs. The keys
+# are seeded, so every process (and every run) gets the same hash for the same board
+ZOBRIST_SEED = 0x5EED
+zobrist_tables = {}
+
+# zobrist_keys[code][cell] for boards of the given number of cells
+def get_zobrist_keys(cells):
+    keys = zobrist_tables.get(cells)
+    if keys is None:
+        generator = random.Random(ZOBRIST_SEED)
+        keys = [[generator.getrandbits(64) for _ in range(cells)] for _ in range(len(color_codes))]
+        zobrist_tables[cells] = keys
+    return keys
+
+def get_zobrist_hash(key, n):
+    zobrist_keys = get_zobrist_keys(n * n)
+    board_hash = 0
+    for i in range(n * n):
+        board_hash ^= zobrist_keys[get_cell(key, i)][i]
+    return board_hash
+
+# Lightweight search node: fixed slots and no per node tables. Searches that keep their nodes
+# in a NodePool only build PuzzleState objects for the solution path
+class PuzzleState:
+    __slots__ = ('key', 'n', 'parent', 'move', 'depth', 'cost', 'blank_pos', 'h', 'matched')
+
+    def __init__(self, key, n, parent, move, depth, cost, blank_pos=None, h=0, matched=0):
+        self.key = key  # The bit-packed puzzle board configuration
+        self.n = n
+        self.parent = parent  # Parent state
+        self.move = move  # Move to reach this state
+        self.depth = depth  # Depth in the search tree
+        self.cost = cost  # Cost (depth + heuristic)
+        self.h = h  # Heuristic value, updated incrementally on every move
+        self.matched = matched  # Number of internal cells already matching the goal
+        self.blank_pos = blank_pos if blank_pos is not None else find_blank(key, n)
+
+    def __lt__(self, other):
+        return self.cost < other.cost
+
+    # The list form of the board is only built on demand (printing)
+    @property
+    def board(self):
+        return decode_board(self.key, self.n)
+    
+    # Function to display the board in a visually appealing format
+    def print_board(self):
+        from termcolor import colored
+        board = self.board
+        print("+" + "---+" * self.n)
+        for row in range(0, self.n * self.n,self.n):
+            row_visual = "|"
+            for tile in board[row:row + self.n]:
+                if tile == "*":  # Blank tile
+                    row_visual += f" {colored(' ', 'cyan')} |"
+                else:
+                    row_visual += f" {colored(tile, 'yellow')} |"
+            print(row_visual)
+            print("+" + "---+" * self.n)
+
+    # Moves from the initial state to this state
+    def get_solution_moves(self):
+        moves = []
+        current = self
+        while current.parent is not None:
+            moves.append(current.move)
+            current = current.parent
+        moves.reverse()
+        return moves
+
+    # Function to print the solution path
+    def print_solution(self):
+        path = []
+        current = self
+        while current:
+            path.append(current)
+            current = current.parent
+        path.reverse()  # Para mostrar desde el inicio hasta la meta
+
+        for step in path:
+            print(f"Move: {step.move}")  # Imprime el movimiento que llevó a este estado
+            step.print_board()  # Asegura que se imprime el estado correcto
@@ -0,0 +1,190 @@
+import argparse
+import sys
+import time
+import numpy as np
+from board import generate_random_state, getGoalState, move_away, get_internal_matrix_index, code_colors, flatten
+from reader import parse_state_line
+
+""" Bulk generator of scrambled instances.
+
+Every instance is a random board with only colored tiles in its centre (like
+generate_random_state), its centre as the goal (like getGoalState) and the board scrambled by
+random legal moves of the blank that never undo the previous one (like move_away), so it is
+always solvable in at most that many moves. Batches of instances are built at once as NumPy
+arrays of color codes, one row per board, which makes millions of instances per minute.
+
+Formats:
+    text    one instance per line in the form of reader.parse_state_line: the n*n cells of the
+            board and the (n-2)*(n-2) cells of the goal row by row, separated by a space
+    binary  BINARY_MAGIC, the size n, then fixed size records with the cells of the board and of
+            the goal packed two per byte """
+
+BINARY_MAGIC = b'RRIN'
+
+# Instances built per batch
+CHUNK_SIZE = 100_000
+
+FORMATS = ('text', 'binary')
+
+# Color symbol of every color code, to turn the code arrays into text
+symbols = np.frombuffer(''.join(code_colors[code] for code in range(len(code_colors))).encode(), dtype=np.uint8)
+
+def check_size(n):
+    if n < 3 or (n * n - 1) % 6 != 0:
+        raise ValueError(f'Invalid size {n}: the {n * n - 1} tiles must split evenly into 6 colors')
+
+# Single instance with the functions of board.py: (initial state, goal state)
+def generate_instance(n, depth):
+    grid = generate_random_state(n)
+    goal_state = getGoalState(grid, n)
+    move_away(grid, n, depth)
+    return grid, goal_state
+
+# Neighbor cells of every blank position leaving out the previous blank position (n*n when
+# there is none): options[blank, previous, :counts[blank, previous]]
+def build_move_options(n):
+    cells = n * n
+    options = np.zeros((cells, cells + 1, 4), dtype=np.int64)
+    counts = np.zeros((cells, cells + 1), dtype=np.int64)
+    for blank in range(cells):
+        row, column = divmod(blank, n)
+        neighbors = []
+        if row > 0:
+            neighbors.append(blank - n)
+        if row < n - 1:
+            neighbors.append(blank + n)
+        if column > 0:
+            neighbors.append(blank - 1)
+        if column < n - 1:
+            neighbors.append(blank + 1)
+        for previous in range(cells + 1):
+            candidates = [cell for cell in neighbors if cell != previous]
+            options[blank, previous, :len(candidates)] = candidates
+            counts[blank, previous] = len(candidates)
+    return options, counts
+
+class InstanceGenerator:
+    def __init__(self, n, depth, seed=None):
+        check_size(n)
+        if depth < 0:
+            raise ValueError('The scramble depth must not be negative')
+        self.n = n
+        self.depth = depth
+        self.rng = np.random.default_rng(seed)
+        cells = n * n
+        self.internal = np.array(get_internal_matrix_index(n), dtype=np.int64)
+        self.external = np.array([i for i in range(cells) if i not in set(get_internal_matrix_index(n))], dtype=np.int64)
+        # Every colored tile once: (n*n - 1) / 6 tiles of each color
+        self.tiles = np.repeat(np.arange(1, 7, dtype=np.uint8), (cells - 1) // 6)
+        self.options, self.counts = build_move_options(n)
+
+    # (boards, goals): color code arrays of count instances, one row each
+    def generate(self, count):
+        rng = self.rng
+        n = self.n
+        cells = n * n
+        rows = np.arange(count)
+
+        # Random colored tiles in the centre, the rest of them and the blank around it
+        tiles = self.tiles[np.argsort(rng.random((count, len(self.tiles))), axis=1)]
+        centre_size = len(self.internal)
+        outside = np.concatenate((tiles[:, centre_size:], np.zeros((count, 1), dtype=np.uint8)), axis=1)
+        outside = outside[rows[:, None], np.argsort(rng.random(outside.shape), axis=1)]
+        boards = np.empty((count, cells), dtype=np.uint8)
+        boards[:, self.internal] = tiles[:, :centre_size]
+        boards[:, self.external] = outside
+        goals = boards[:, self.internal].copy()
+
+        blank = self.external[np.argmax(outside == 0, axis=1)]
+        previous = np.full(count, cells, dtype=np.int64)
+        for _ in range(self.depth):
+            choice = (rng.random(count) * self.counts[blank, previous]).astype(np.int64)
+            tile = self.options[blank, previous, choice]
+            boards[rows, blank] = boards[rows, tile]
+            boards[rows, tile] = 0
+            previous = blank
+            blank = tile
+        return boards, goals
+
+def pack_cells(codes):
+    if codes.shape[1] % 2:
+        codes = np.concatenate((codes, np.zeros((len(codes), 1), dtype=np.uint8)), axis=1)
+    return (codes[:, 0::2] << 4) | codes[:, 1::2]
+
+def unpack_cells(packed, cells):
+    codes = np.empty((len(packed), packed.shape[1] * 2), dtype=np.uint8)
+    codes[:, 0::2] = packed >> 4
+    codes[:, 1::2] = packed & 0x0F
+    return codes[:, :cells]
+
+def format_text(boards, goals):
+    lines = np.empty((len(boards), boards.shape[1] + goals.shape[1] + 2), dtype=np.uint8)
+    lines[:, :boards.shape[1]] = symbols[boards]
+    lines[:, boards.shape[1]] = ord(' ')
+    lines[:, boards.shape[1] + 1:-1] = symbols[goals]
+    lines[:, -1] = ord('\n')
+    return lines.tobytes()
+
+def format_binary(boards, goals):
+    return np.concatenate((pack_cells(boards), pack_cells(goals)), axis=1).tobytes()
+
+def write_instances(output, n, depth, count, seed=None, file_format='text'):
+    if file_format not in FORMATS:
+        raise ValueError(f'Invalid format: {file_format}, must be one of {FORMATS}')
+    generator = InstanceGenerator(n, depth, seed)
+    if file_format == 'binary':
+        output.write(BINARY_MAGIC + bytes([n]))
+    written = 0
+    while written < count:
+        boards, goals = generator.generate(min(CHUNK_SIZE, count - written))
+        output.write(format_text(boards, goals) if file_format == 'text' else format_binary(boards, goals))
+        written += len(boards)
+
+# Parses a line of the text format into (initial state, goal state, n)
+def parse_instance_line(line):
+    initial_file_state, goal_file_state = parse_state_line(line)
+    return flatten(initial_file_state), flatten(goal_file_state), len(initial_file_state)
+
+# Yields (initial state, goal state, n) for every instance of a file in any of the formats
+def read_instances(file_name):
+    with open(file_name, 'rb') as file:
+        if file.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            file.seek(0)
+            for line in file:
+                if line.strip():
+                    yield parse_instance_line(line.decode())
+            return
+        n = file.read(1)[0]
+        cells = n * n
+        goal_cells = (n - 2) * (n - 2)
+        board_bytes = (cells + 1) // 2
+        record_size = board_bytes + (goal_cells + 1) // 2
+        while True:
+            data = file.read(record_size * CHUNK_SIZE)
+            if not data:
+                return
+            records = np.frombuffer(data, dtype=np.uint8).reshape(-1, record_size)
+            boards = unpack_cells(records[:, :board_bytes], cells)
+            goals = unpack_cells(records[:, board_bytes:], goal_cells)
+            for board, goal in zip(boards.tolist(), goals.tolist()):
+                yield [code_colors[code] for code in board], [code_colors[code] for code in goal], n
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate scrambled Rubik\'s Race instances in bulk')
+    parser.add_argument('--count', type=int, required=True, help='number of instances')
+    parser.add_argument('--depth', type=int, default=80, help='random moves of the blank (default: 80)')
+    parser.add_argument('--size', type=int, default=5, help='board size (default: 5)')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--format', choices=FORMATS, default='text')
+    parser.add_argument('--output', default=None, help='output file (default: stdout)')
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    output = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        write_instances(output, args.size, args.depth, args.count, args.seed, args.format)
+    finally:
+        if args.output:
+            output.close()
+    elapsed = time.perf_counter() - start_time
+    print(f'{args.count} instances in {elapsed:.2f}s ({args.count / elapsed * 60:,.0f} per minute)', file=sys.stderr)
@@ -0,0 +1,247 @@
+import heapq
+import multiprocessing
+import queue
+
+""" Hash distributed A* (HDA*).
+
+Every worker process owns the boards whose hash falls in its partition, with its own open list
+and best-g table. Generated children are sent to their owner in batches over queues. A goal
+becomes the incumbent solution, shared by every worker, and nodes with f >= incumbent are not
+expanded. The search ends when every worker is idle and every message sent has been received,
+at which point no open node can improve the incumbent, so it is optimal (admissible h).
+
+The solution path is rebuilt at the end by asking the owner of each board for its parent. """
+
+# Nodes per message sent to another worker
+BATCH_SIZE = 256
+
+# Expansions between two checks of the inbox (and flushes of the outgoing batches)
+EXPANSIONS_PER_POLL = 64
+
+# Seconds an idle worker (or the coordinator) waits for a message before checking again
+POLL_TIMEOUT = 0.05
+
+NO_SOLUTION = 2 ** 31 - 1
+
+# Counters every worker publishes in its row of the shared counters array
+COUNTERS = ('nodes_expanded', 'nodes_generated', 'duplicates_pruned', 'stale_dropped', 'peak_open', 'peak_closed')
+
+def partition(key, workers):
+    # Fibonacci hashing of the board key, the low bits of the key itself are a single cell
+    return (((hash(key) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> 32) % workers
+
+class HDAWorker:
+    def __init__(self, index, graph, heuristic, inboxes, results, incumbent, sent, received, idle, counters):
+        self.index = index
+        self.graph = graph
+        self.heuristic = heuristic
+        self.inboxes = inboxes
+        self.results = results
+        self.incumbent = incumbent
+        self.sent = sent
+        self.received = received
+        self.idle = idle
+        self.counters = counters
+        self.nodes_expanded = 0
+        self.nodes_generated = 0
+        self.duplicates_pruned = 0
+        self.stale_dropped = 0
+        self.peak_open = 0
+        self.workers = len(inboxes)
+        self.goal_matched = len(graph.internal_matrix_index)
+        self.open_list = []
+        # Board key -> (g, h, matched, blank position, parent key, move)
+        self.best = {}
+        self.out_buffers = [[] for _ in range(self.workers)]
+        self.running = True
+
+    def add_node(self, node):
+        key, g, h, matched, blank_pos, parent_key, move = node
+        best = self.best.get(key)
+        if best is not None and best[0] <= g:
+            self.duplicates_pruned += 1
+            return
+        self.best[key] = (g, h, matched, blank_pos, parent_key, move)
+        heapq.heappush(self.open_list, (g + h, h, key))
+
+    def send(self, owner, message):
+        self.sent[self.index] += 1
+        self.inboxes[owner].put(message)
+
+    def flush(self):
+        for owner, buffer in enumerate(self.out_buffers):
+            if buffer:
+                self.send(owner, ('nodes', buffer))
+                self.out_buffers[owner] = []
+
+    def handle(self, message):
+        self.idle[self.index] = 0
+        self.received[self.index] += 1
+        kind = message[0]
+        if kind == 'nodes':
+            for node in message[1]:
+                self.add_node(node)
+        elif kind == 'trace':
+            key = message[1]
+            g, h, matched, blank_pos, parent_key, move = self.best[key]
+            self.results.put(('trace', key, parent_key, move))
+        elif kind == 'stop':
+            self.running = False
+
+    # Returns True while the open list holds a node that can still improve the incumbent
+    def has_work(self):
+        while self.open_list:
+            f, h, key = self.open_list[0]
+            best = self.best[key]
+            if best[0] + best[1] != f:
+                heapq.heappop(self.open_list)  # Stale entry, the board was reached with a lower g
+                self.stale_dropped += 1
+                continue
+            return f < self.incumbent.value
+        return False
+
+    def expand_next(self):
+        f, h, key = heapq.heappop(self.open_list)
+        g, h, matched, blank_pos, parent_key, move = self.best[key]
+        if matched == self.goal_matched:
+            with self.incumbent.get_lock():
+                if g < self.incumbent.value:
+                    self.incumbent.value = g
+            # Counted as a message so the coordinator cannot stop before reading it
+            self.sent[self.index] += 1
+            self.results.put(('goal', g, key))
+            return
+        self.nodes_expanded += 1
+        for child_move, child_key, child_blank_pos, child_h, child_matched in self.graph.expand_key(key, blank_pos, h, matched, self.heuristic):
+            self.nodes_generated += 1
+            if g + 1 + child_h >= self.incumbent.value:
+                continue
+            node = (child_key, g + 1, child_h, child_matched, child_blank_pos, key, child_move)
+            owner = partition(child_key, self.workers)
+            if owner == self.index:
+                self.add_node(node)
+            else:
+                buffer = self.out_buffers[owner]
+                buffer.append(node)
+                if len(buffer) >= BATCH_SIZE:
+                    self.send(owner, ('nodes', buffer))
+                    self.out_buffers[owner] = []
+
+    def publish_counters(self):
+        self.peak_open = max(self.peak_open, len(self.open_list))
+        values = (self.nodes_expanded, self.nodes_generated, self.duplicates_pruned, self.stale_dropped, self.peak_open, len(self.best))
+        offset = self.index * len(COUNTERS)
+        self.counters[offset:offset + len(COUNTERS)] = values
+
+    def run(self):
+        inbox = self.inboxes[self.index]
+        while self.running:
+            # Drain the inbox without blocking
+            try:
+                while True:
+                    self.handle(inbox.get_nowait())
+            except queue.Empty:
+                pass
+
+            expansions = 0
+            while self.running and expansions < EXPANSIONS_PER_POLL and self.has_work():
+                self.expand_next()
+                expansions += 1
+            self.flush()
+            self.publish_counters()
+
+            if self.running and not self.has_work():
+                self.idle[self.index] = 1
+                try:
+                    self.handle(inbox.get(timeout=POLL_TIMEOUT))
+                except queue.Empty:
+                    pass
+
+def run_worker(index, initial_state, goal_state, n, pattern_database_dir, heuristic, inboxes, results, incumbent, sent, received, idle, counters):
+    from informed_search import AStarSearchGraph
+    graph = AStarSearchGraph(initial_state, goal_state, n, pattern_database_dir)
+    HDAWorker(index, graph, heuristic, inboxes, results, incumbent, sent, received, idle, counters).run()
+
+# Totals of the worker counters (peaks are summed too, the workers hold their nodes at once)
+def collect_counters(stats, counters, workers):
+    for position, name in enumerate(COUNTERS):
+        setattr(stats, name, sum(counters[index * len(COUNTERS) + position] for index in range(workers)))
+
+def check_workers(processes):
+    if not all(process.is_alive() for process in processes):
+        raise RuntimeError('An HDA* worker stopped unexpectedly')
+
+def hda_star(graph, heuristic, workers=None):
+    workers = workers or multiprocessing.cpu_count()
+    inboxes = [multiprocessing.Queue() for _ in range(workers)]
+    results = multiprocessing.Queue()
+    incumbent = multiprocessing.Value('q', NO_SOLUTION)
+    sent = multiprocessing.Array('q', workers, lock=False)
+    received = multiprocessing.Array('q', workers, lock=False)
+    idle = multiprocessing.Array('b', workers, lock=False)
+    counters = multiprocessing.Array('q', workers * len(COUNTERS), lock=False)
+    stats = graph.new_stats('hda_star', heuristic)
+    processes = [multiprocessing.Process(target=run_worker, args=(index, graph.initial_state, graph.goal_state, graph.n, graph.pattern_database_dir,
+                                                                  heuristic, inboxes, results, incumbent, sent, received, idle, counters), daemon=True)
+                 for index in range(workers)]
+    for process in processes:
+        process.start()
+
+    try:
+        start_state = graph.create_initial_state(heuristic)
+        start_node = (start_state.key, 0, start_state.h, start_state.matched, start_state.blank_pos, None, None)
+        inboxes[partition(start_state.key, workers)].put(('nodes', [start_node]))
+        coordinator_sent = 1
+        coordinator_received = 0
+        best_goal = None
+        previous_snapshot = None
+
+        # Termination: every worker idle and no message in flight, observed twice in a row
+        while True:
+            try:
+                message = results.get(timeout=POLL_TIMEOUT)
+                coordinator_received += 1
+                cost, key = message[1], message[2]
+                if best_goal is None or cost < best_goal[0]:
+                    best_goal = (cost, key)
+                continue
+            except queue.Empty:
+                pass
+            check_workers(processes)
+            if stats.on_progress is not None:
+                collect_counters(stats, counters, workers)
+                if stats.nodes_expanded >= stats.next_progress:
+                    stats.progress()
+            snapshot = (sum(sent) + coordinator_sent, sum(received) + coordinator_received)
+            if all(idle) and snapshot[0] == snapshot[1] and snapshot == previous_snapshot:
+                break
+            previous_snapshot = snapshot if all(idle) else None
+
+        collect_counters(stats, counters, workers)
+        if best_goal is None:
+            return None
+
+        # Walk the parent links back to the start, asking the owner of every board
+        moves = []
+        key = best_goal[1]
+        while True:
+            inboxes[partition(key, workers)].put(('trace', key))
+            while True:
+                try:
+                    kind, traced_key, parent_key, move = results.get(timeout=POLL_TIMEOUT)
+                    break
+                except queue.Empty:
+                    check_workers(processes)
+            if parent_key is None:
+                break
+            moves.append(move)
+            key = parent_key
+        moves.reverse()
+        return graph.replay_moves(moves, heuristic)
+    finally:
+        for inbox in inboxes:
+            inbox.put(('stop',))
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
@@ -0,0 +1,211 @@
+from array import array
+from core import decode_board, color_codes, get_zobrist_keys, get_zobrist_hash, BITS_PER_CELL
+
+""" Non recursive IDA* engine.
+
+The search keeps a single mutable board and applies/undoes the blank swap in place. The
+current path lives in preallocated arrays (one slot per depth), so no objects are created
+while searching; PuzzleState objects are only built for the solution path. """
+
+# Initial number of depth slots, doubled whenever a deeper path is reached
+INITIAL_MAX_DEPTH = 256
+
+class IDAStarEngine:
+    # By default the search starts from the initial state of the graph. A subtree can be searched
+    # instead by giving its root key, the depth of that root and the blank position of its parent.
+    # Node counts go to stats (a SearchStats) when given
+    def __init__(self, graph, heuristic, transposition_table=None, root_key=None, root_depth=0, previous_blank_pos=-1, stats=None):
+        self.graph = graph
+        self.heuristic = heuristic
+        self.transposition_table = transposition_table
+        self.stats = stats
+        self.root_depth = root_depth
+        self.previous_blank_pos = previous_blank_pos
+        self.table = graph.heuristic_tables.get(heuristic)
+        self.evaluate = graph.heuristics[heuristic]
+        self.goal_matched = len(graph.internal_matrix_index)
+
+        # Mutable search position
+        self.key = graph.initial_key if root_key is None else root_key
+        self.cells = bytearray(color_codes[color] for color in decode_board(self.key, graph.n))
+        self.blank_pos = self.cells.index(color_codes['*'])
+        self.h = self.evaluate(self.key)
+        self.matched = graph.count_matched(self.key)
+        self.depth = 0
+
+        # Zobrist hash of the board, only kept up to date (and needed) with a transposition table
+        self.zobrist_keys = get_zobrist_keys(graph.n * graph.n)
+        self.board_hash = get_zobrist_hash(self.key, graph.n)
+
+        # Path stacks, indexed by depth: blank position, h and matched count of the node at that
+        # depth, the move leaving it and the index of its next child to try
+        self.allocate(INITIAL_MAX_DEPTH)
+
+    def allocate(self, max_depth):
+        self.max_depth = max_depth
+        self.blank_stack = array('i', [0]) * max_depth
+        self.h_stack = array('i', [0]) * max_depth
+        self.matched_stack = array('i', [0]) * max_depth
+        self.child_stack = array('i', [0]) * max_depth
+        self.move_stack = [None] * max_depth
+
+    def grow(self):
+        extra = self.max_depth
+        self.max_depth *= 2
+        self.blank_stack.extend(array('i', [0]) * extra)
+        self.h_stack.extend(array('i', [0]) * extra)
+        self.matched_stack.extend(array('i', [0]) * extra)
+        self.child_stack.extend(array('i', [0]) * extra)
+        self.move_stack.extend([None] * extra)
+
+    def record(self, expanded, generated, pruned):
+        if self.stats is not None:
+            self.stats.nodes_expanded += expanded
+            self.stats.nodes_generated += generated
+            self.stats.duplicates_pruned += pruned
+
+    # Depth first search bounded by threshold from the root. Returns (f, True) when the goal is
+    # found (the engine is left on the goal board) or (minimum f over the threshold, False)
+    def search(self, threshold):
+        f = self.root_depth + self.h
+        if f > threshold:
+            return f, False
+        if self.matched == self.goal_matched:
+            return f, True
+
+        graph = self.graph
+        legal_moves = graph.legal_moves
+        goal_cell_codes = graph.goal_cell_codes
+        table = self.table
+        evaluate = self.evaluate
+        transposition_table = self.transposition_table
+        goal_matched = self.goal_matched
+        cells = self.cells
+        blank_stack = self.blank_stack
+        h_stack = self.h_stack
+        matched_stack = self.matched_stack
+        child_stack = self.child_stack
+        move_stack = self.move_stack
+        zobrist_keys = self.zobrist_keys
+        blank_keys = zobrist_keys[0]
+
+        key = self.key
+        board_hash = self.board_hash
+        blank_pos = self.blank_pos
+        h = self.h
+        matched = self.matched
+        root_depth = self.root_depth
+        previous_blank_pos = self.previous_blank_pos
+        depth = 0
+        child_stack[0] = 0
+        min_overflow = float('inf')
+
+        # Counts since the last time they were recorded into the stats
+        stats = self.stats
+        expanded = 1
+        generated = 0
+        pruned = 0
+        progress_at = stats.next_progress - stats.nodes_expanded if stats is not None else float('inf')
+
+        while True:
+            moves = legal_moves[blank_pos]
+            child = child_stack[depth]
+
+            if child == len(moves):
+                if depth == 0:
+                    self.record(expanded, generated, pruned)
+                    return min_overflow, False
+                # Undo the move that led to this node
+                depth -= 1
+                previous_blank_pos = blank_stack[depth]
+                code = cells[previous_blank_pos]
+                cells[blank_pos] = code
+                cells[previous_blank_pos] = 0
+                key += (code << (blank_pos * BITS_PER_CELL)) - (code << (previous_blank_pos * BITS_PER_CELL))
+                if transposition_table is not None:
+                    tile_keys = zobrist_keys[code]
+                    board_hash ^= tile_keys[blank_pos] ^ tile_keys[previous_blank_pos] ^ blank_keys[blank_pos] ^ blank_keys[previous_blank_pos]
+                blank_pos = previous_blank_pos
+                h = h_stack[depth]
+                matched = matched_stack[depth]
+                continue
+
+            child_stack[depth] = child + 1
+            move, tile_pos = moves[child]
+
+            # Never move the blank straight back to where it came from
+            if tile_pos == (blank_stack[depth - 1] if depth > 0 else previous_blank_pos):
+                continue
+
+            code = cells[tile_pos]
+            new_key = key + (code << (blank_pos * BITS_PER_CELL)) - (code << (tile_pos * BITS_PER_CELL))
+            generated += 1
+            if table is not None:
+                tile_table = table[code]
+                blank_table = table[0]
+                new_h = h + tile_table[blank_pos] - tile_table[tile_pos] + blank_table[tile_pos] - blank_table[blank_pos]
+            else:
+                new_h = evaluate(new_key)
+
+            f = root_depth + depth + 1 + new_h
+            if f > threshold:
+                if f < min_overflow:
+                    min_overflow = f
+                continue
+
+            new_matched = matched + (goal_cell_codes[blank_pos] == code) - (goal_cell_codes[tile_pos] == code) \
+                + (goal_cell_codes[tile_pos] == 0) - (goal_cell_codes[blank_pos] == 0)
+            if transposition_table is not None:
+                tile_keys = zobrist_keys[code]
+                new_hash = board_hash ^ tile_keys[blank_pos] ^ tile_keys[tile_pos] ^ blank_keys[blank_pos] ^ blank_keys[tile_pos]
+                if new_matched != goal_matched and transposition_table.should_prune(new_hash, root_depth + depth + 1):
+                    pruned += 1
+                    continue
+                board_hash = new_hash
+
+            # Apply the move in place
+            if depth + 1 >= self.max_depth:
+                self.grow()
+                blank_stack = self.blank_stack
+                h_stack = self.h_stack
+                matched_stack = self.matched_stack
+                child_stack = self.child_stack
+                move_stack = self.move_stack
+            blank_stack[depth] = blank_pos
+            h_stack[depth] = h
+            matched_stack[depth] = matched
+            move_stack[depth] = move
+            cells[blank_pos] = code
+            cells[tile_pos] = 0
+            key = new_key
+            blank_pos = tile_pos
+            h = new_h
+            matched = new_matched
+            depth += 1
+            child_stack[depth] = 0
+
+            if matched == goal_matched:
+                self.record(expanded, generated, pruned)
+                self.key = key
+                self.board_hash = board_hash
+                self.blank_pos = blank_pos
+                self.h = h
+                self.matched = matched
+                self.depth = depth
+                return f, True
+
+            expanded += 1
+            if expanded >= progress_at:
+                self.record(expanded, generated, pruned)
+                expanded = generated = pruned = 0
+                stats.progress()
+                progress_at = stats.next_progress - stats.nodes_expanded
+
+    # Moves from the root to the board the engine is standing on
+    def get_moves(self):
+        return self.move_stack[:self.depth]
+
+    # Builds the PuzzleState chain of the path the engine is standing on (from the initial state
+    # of the graph, so only for engines searching from it)
+    def solution(self):
+        return self.graph.replay_moves(self.get_moves(), self.heuristic)
@@ -1,12 +1,189 @@
-import heapq
+import time
 from collections import defaultdict
-from board import PuzzleState, get_internal_matrix_index, get_coordinates_from_index, get_index_from_coordinates, move_tile
+from pattern_database import PatternDatabase
+from assignment import min_cost_assignment
+from transposition_table import TranspositionTable
+from ida_engine import IDAStarEngine
+from open_list import BucketOpenList
+from stats import SearchStats, TimedOpenList, PROGRESS_INTERVAL
+from node_pool import NodePool, NO_PARENT
+from core import PuzzleState, get_internal_matrix_index, get_coordinates_from_index, encode_board, get_cell, code_colors, color_codes, BITS_PER_CELL, CELL_MASK
+
+# Maximum number of memoized per-color matchings of the assignment heuristic
+ASSIGNMENT_CACHE_SIZE = 1_000_000
+
+# Heuristics that never overestimate, so the searches that rely on it stay optimal with them.
+# missplaced counts every tile outside its color's goal cells, even the ones not needed there,
+# and manhattan adds a mismatch penalty to the distance, so both can overestimate
+ADMISSIBLE_HEURISTICS = ('pattern_database', 'assignment')
+
+# Search methods that can be run through AStarSearchGraph.solve. Only a_star and IDA_star are
+# imported with this module, the other searches load their modules (and multiprocessing or
+# NumPy) the first time they run, so solver processes start quickly
+SEARCHES = ('a_star', 'a_star_batched', 'IDA_star', 'parallel_IDA_star', 'hda_star', 'sma_star', 'anytime_a_star')
+
+# Searches offered by the command line solvers: they run in the calling process (the parallel
+# ones start processes of their own) and need no option (sma_star needs a memory budget)
+SERIAL_SEARCHES = ('a_star', 'a_star_batched', 'IDA_star', 'anytime_a_star')
+
+HEURISTICS = ('manhattan', 'missplaced', 'pattern_database', 'assignment')
 
 class AStarSearchGraph:
-    def __init__(self, initial_state,  goal_state, n):
+    def __init__(self, initial_state,  goal_state, n, pattern_database_dir=None):
         self.n = n
         self.initial_state = initial_state
         self.goal_state = goal_state
+        self.initial_key = encode_board(initial_state)
+
+        # The goal only constrains the internal matrix, so it is tested with a mask over those cells
+        self.goal_mask = 0
+        self.goal_key = 0
+        for i, index in enumerate(get_internal_matrix_index(n)):
+            self.goal_mask |= CELL_MASK << (index * BITS_PER_CELL)
+            self.goal_key |= color_codes[goal_state[i]] << (index * BITS_PER_CELL)
+
+        # Goal dependent tables are built once and shared by every search on this graph
+        self.internal_matrix_index = get_internal_matrix_index(n)
+        self.colors_goal_positions = self.calculate_colors_goal_positions(goal_state)
+        self.heuristic_tables = {
+            'manhattan': self.build_manhattan_table(),
+            'missplaced': self.build_missplaced_table()
+        }
+        self.heuristics = {
+            'manhattan': self.manhattan_distance_heuristic,
+            'missplaced': self.missplaced_tiles_heuristic,
+            'pattern_database': self.pattern_database_heuristic,
+            'assignment': self.assignment_heuristic
+        }
+
+        # Manhattan distance between every pair of cells and the goal cells of every color,
+        # shared by every evaluation of the assignment heuristic
+        self.distance_matrix = [[self.manhattan_distance(get_coordinates_from_index(i, n), get_coordinates_from_index(j, n)) for j in range(n * n)] for i in range(n * n)]
+        self.colors_goal_cells = defaultdict(list)
+        for i, index in enumerate(self.internal_matrix_index):
+            if goal_state[i] != '*':
+                self.colors_goal_cells[color_codes[goal_state[i]]].append(index)
+        self.assignment_cache = {}
+
+        # Counters of the last search run on this graph, and the options (profile, on_progress,
+        # progress_interval) of the SearchStats created by the next searches, set by solve
+        self.stats = None
+        self.instrumentation = {}
+
+        # The pattern database is only built (or mapped from disk) the first time it is used
+        self.pattern_database = None
+        self.pattern_database_dir = pattern_database_dir
+
+        # Goal color code of every internal cell (-1 elsewhere) to keep the matched count up to date
+        self.goal_cell_codes = [-1] * (n * n)
+        for i, index in enumerate(self.internal_matrix_index):
+            self.goal_cell_codes[index] = color_codes[goal_state[i]]
+
+        # Legal (move, new blank position) pairs for every blank position
+        self.legal_moves = [self.calculate_legal_moves(blank_pos) for blank_pos in range(n * n)]
+
+    def new_stats(self, algorithm, heuristic):
+        self.stats = SearchStats(algorithm, heuristic, **self.instrumentation)
+        return self.stats
+
+    # Runs one of the SEARCHES and returns (solution state or None, SearchStats).
+    # on_progress(stats) is called every progress_interval expansions, and profile measures the
+    # time spent in the heuristic, the expansion and the open list (in this process only, not in the
+    # workers of the parallel searches). options go to the search
+    def solve(self, algorithm, heuristic, profile=False, on_progress=None, progress_interval=PROGRESS_INTERVAL, **options):
+        if algorithm not in SEARCHES:
+            raise ValueError(f'Invalid algorithm: {algorithm}, must be one of {SEARCHES}')
+        if heuristic not in self.heuristics:
+            raise ValueError(f'Invalid heuristic: {heuristic}, must be one of {tuple(self.heuristics)}')
+
+        heuristics = self.heuristics
+        self.instrumentation = {'profile': profile, 'on_progress': on_progress, 'progress_interval': progress_interval}
+        if profile:
+            self.heuristics = {name: self.time_heuristic(function) for name, function in heuristics.items()}
+        try:
+            result = getattr(self, algorithm)(heuristic, **options)
+        finally:
+            self.heuristics = heuristics
+            self.instrumentation = {}
+        if algorithm in ('IDA_star', 'parallel_IDA_star'):
+            result = result[0]
+        return result, self.stats
+
+    # Wraps a heuristic so the time spent in it goes to the heuristic_time of the current stats
+    def time_heuristic(self, function):
+        def timed_heuristic(key):
+            start = time.perf_counter()
+            h = function(key)
+            if self.stats is not None:
+                self.stats.heuristic_time += time.perf_counter() - start
+            return h
+        return timed_heuristic
+
+    # Reuses the goal dependent tables for another initial board of the same size
+    def set_initial_state(self, initial_state):
+        self.initial_state = initial_state
+        self.initial_key = encode_board(initial_state)
+
+    def is_goal(self, key):
+        return key & self.goal_mask == self.goal_key
+
+    def calculate_legal_moves(self, blank_pos):
+        legal_moves = []
+        if blank_pos >= self.n: # Valid move down
+            legal_moves.append(('D', blank_pos - self.n))
+        if blank_pos < self.n * (self.n - 1): # Valid move up
+            legal_moves.append(('U', blank_pos + self.n))
+        if blank_pos % self.n != 0: # Valid move right
+            legal_moves.append(('R', blank_pos - 1))
+        if blank_pos % self.n != self.n - 1: # Valid move left
+            legal_moves.append(('L', blank_pos + 1))
+        return legal_moves
+
+    def count_matched(self, key):
+        return sum(1 for index in self.internal_matrix_index if get_cell(key, index) == self.goal_cell_codes[index])
+
+    def create_initial_state(self, heuristic):
+        key = self.initial_key
+        h = self.heuristics[heuristic](key)
+        return PuzzleState(key, self.n, None, None, 0, h, h=h, matched=self.count_matched(key))
+
+    def create_state(self, key, parent, move, blank_pos, h, matched):
+        return PuzzleState(key, self.n, parent, move, parent.depth + 1, parent.depth + 1 + h, blank_pos, h, matched)
+
+    # Builds the PuzzleState chain reached by applying the moves to the initial state
+    def replay_moves(self, moves, heuristic):
+        state = self.create_initial_state(heuristic)
+        for move in moves:
+            for child_move, key, blank_pos, h, matched in self.expand(state, heuristic):
+                if child_move == move:
+                    state = self.create_state(key, state, move, blank_pos, h, matched)
+                    break
+            else:
+                raise ValueError(f'Invalid move {move} from blank position {state.blank_pos}')
+        return state
+
+    # Generates (move, key, blank position, h, matched) for every child of the state.
+    # A move only swaps the blank with one tile, so h (for table heuristics) and the matched
+    # count are updated from those two cells instead of rescoring the whole board
+    def expand(self, state, heuristic):
+        return self.expand_key(state.key, state.blank_pos, state.h, state.matched, heuristic)
+
+    # Same as expand for a board given by its fields instead of a PuzzleState
+    def expand_key(self, key, blank_pos, state_h, state_matched, heuristic):
+        table = self.heuristic_tables.get(heuristic)
+        goal_cell_codes = self.goal_cell_codes
+        for move, tile_pos in self.legal_moves[blank_pos]:
+            code = get_cell(key, tile_pos)
+            new_key = key + (code << (blank_pos * BITS_PER_CELL)) - (code << (tile_pos * BITS_PER_CELL))
+            if table is not None:
+                blank_table = table[0]
+                tile_table = table[code]
+                h = state_h + tile_table[blank_pos] - tile_table[tile_pos] + blank_table[tile_pos] - blank_table[blank_pos]
+            else:
+                h = self.heuristics[heuristic](new_key)
+            matched = state_matched + (goal_cell_codes[blank_pos] == code) - (goal_cell_codes[tile_pos] == code) \
+                + (goal_cell_codes[tile_pos] == 0) - (goal_cell_codes[blank_pos] == 0)
+            yield move, new_key, tile_pos, h, matched
 
     #Manhattan distance heuristic functions
     def calculate_colors_goal_positions(self, goal_state):
@@ -17,139 +194,232 @@ class AStarSearchGraph:
     
     def manhattan_distance(self, pos1, pos2):
         return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
+
+    # Lookup table indexed by [color code][cell]: minimum distance from the cell to a goal
+    # position of that color plus the mismatch penalty (only internal cells contribute)
+    def build_manhattan_table(self):
+        table = [[0] * (self.n * self.n) for _ in code_colors]
+        for code, color in code_colors.items():
+            for i in self.internal_matrix_index:
+                y, x = get_coordinates_from_index(i, self.n)
+                if color != '*' and self.colors_goal_positions[color]:
+                    table[code][i] += min(self.manhattan_distance((y, x), pos) for pos in self.colors_goal_positions[color])
+                if color != self.goal_state[(y-1)*(self.n-2)+(x-1)]:
+                    table[code][i] += 1
+        return table
+
+    # Lookup table indexed by [color code][cell]: 1 for every tile out of its color's goal positions
+    def build_missplaced_table(self):
+        table = [[0] * (self.n * self.n) for _ in code_colors]
+        for code, color in code_colors.items():
+            if color == '*':
+                continue
+            for i in range(self.n * self.n):
+                if get_coordinates_from_index(i, self.n) not in self.colors_goal_positions[color]:
+                    table[code][i] = 1
+        return table
+
+    # Sum of the table entries of every cell of the bit-packed board
+    def table_heuristic(self, table, key):
+        total = 0
+        for i in range(self.n * self.n):
+            total += table[key & CELL_MASK][i]
+            key >>= BITS_PER_CELL
+        return total
     
     # Function to calculate the heuristic (Manhattan distance)
-    def manhattan_distance_heuristic(self, board, colors_goal_positions):
-        total_distance = 0
-        colors_goal_positions = colors_goal_positions
-        for i, color in enumerate(board):
-            for y,x in [divmod(i, 5)]:
-                if i in get_internal_matrix_index(self.n):
-                    if board[i] != '*' and colors_goal_positions[color]:
-                        total_distance += min(self.manhattan_distance((y,x), pos) for pos in colors_goal_positions[color])
-                    if color != self.goal_state[(y-1)*(self.n-2)+(x-1)]:
-                        total_distance += 1
-        return total_distance
+    def manhattan_distance_heuristic(self, key):
+        return self.table_heuristic(self.heuristic_tables['manhattan'], key)
 
     # Function to calculate the heuristic (Missplaced tiles)
-    def missplaced_tiles_heuristic(self, board, colors_goal_positions):
-        missplaced_tiles = 0
-        colors_goal_positions = colors_goal_positions
-        for i, color in enumerate(board):
-            for y,x in [divmod(i, 5)]:
-                if color != '*':
-                    if (y,x) not in colors_goal_positions[color]:
-                        missplaced_tiles += 1
-        return missplaced_tiles
+    def missplaced_tiles_heuristic(self, key):
+        return self.table_heuristic(self.heuristic_tables['missplaced'], key)
+
+    # Function to calculate the heuristic (Additive pattern database)
+    def pattern_database_heuristic(self, key):
+        if self.pattern_database is None:
+            self.pattern_database = PatternDatabase(self.goal_state, self.n, self.pattern_database_dir)
+        return self.pattern_database.heuristic(key)
+
+    # Function to calculate the heuristic (Min-cost matching of tiles to goal cells).
+    # Each goal cell of a color must end up holding a distinct tile of that color, and every
+    # move displaces a single tile by one cell, so the sum of the optimal matchings is admissible
+    def assignment_heuristic(self, key):
+        tiles = defaultdict(list)
+        for i in range(self.n * self.n):
+            tiles[key & CELL_MASK].append(i)
+            key >>= BITS_PER_CELL
+
+        total = 0
+        for code, goal_cells in self.colors_goal_cells.items():
+            # The matching of a color only depends on where its tiles are, so it is memoized
+            cache_key = (code, tuple(tiles[code]))
+            matching_cost = self.assignment_cache.get(cache_key)
+            if matching_cost is None:
+                cost = [[self.distance_matrix[goal_cell][tile] for tile in tiles[code]] for goal_cell in goal_cells]
+                matching_cost = min_cost_assignment(cost)
+                if len(self.assignment_cache) >= ASSIGNMENT_CACHE_SIZE:
+                    self.assignment_cache.clear()
+                self.assignment_cache[cache_key] = matching_cost
+            total += matching_cost
+        return total
 
-    
     # A* search algorithm
-    def a_star(self, heuristic):
-        start_state = self.initial_state
-        goal_state = self.goal_state
-        open_list = []
-        closed_list = set()
-        colors_goal_positions = self.calculate_colors_goal_positions(goal_state)
-        if heuristic == 'manhattan':
-            heapq.heappush(open_list, PuzzleState(start_state,  self.n, None, None, 0, self.manhattan_distance_heuristic(start_state, colors_goal_positions)))
-        elif heuristic == 'missplaced':
-            heapq.heappush(open_list, PuzzleState(start_state,  self.n, None, None, 0, self.missplaced_tiles_heuristic(start_state, colors_goal_positions)))
-        else:
+    # tie_breaking picks the order among nodes of equal f, see open_list.TIE_BREAKING.
+    # Nodes live in a NodePool (the open list and the best-g index only hold node indexes) and
+    # PuzzleState objects are only built for the solution path.
+    # Counters of the search (expansions, duplicates, peak frontier) are left in self.stats
+    def a_star(self, heuristic, tie_breaking='h'):
+        open_list = BucketOpenList(tie_breaking)
+        nodes = NodePool(self.n)
+        # Board key -> index of the node with the lowest g found so far, open or expanded
+        best_node = {}
+        if heuristic not in self.heuristics:
             print("Invalid heuristic")
             return None
+        stats = self.new_stats('a_star', heuristic)
+        expand_key = self.expand_key
+        if stats.profile:
+            open_list = TimedOpenList(open_list, stats)
+            expand_key = stats.time_expansion(expand_key)
+        start_state = self.create_initial_state(heuristic)
+        start = nodes.add(start_state.key, NO_PARENT, None, 0, start_state.h, start_state.blank_pos, start_state.matched)
+        open_list.push(start, start_state.h, 0, start_state.h)
+        best_node[start_state.key] = start
+        goal_matched = len(self.internal_matrix_index)
+        keys = nodes.keys
+        g_column = nodes.g
+        f_column = nodes.f
+        blank_column = nodes.blank_positions
+        matched_column = nodes.matched
 
-        c = 0
-        while open_list:
-            c += 1
-            current_state = heapq.heappop(open_list)
-            current_state_goal_positions = [current_state.board[i] for i in current_state.internal_matrix_index]
-
-            if current_state_goal_positions == goal_state:
-                return current_state
-            
-            closed_list.add(tuple(current_state.board))
+        # The closed table size is recorded however the search ends, a timeout included
+        try:
+            while open_list:
+                if len(open_list) > stats.peak_open:
+                    stats.peak_open = len(open_list)
+                current = open_list.pop()
+                key = keys[current]
 
-            blank_pos = current_state.board.index("*")
-
-            for move in current_state.moves:
-                if move == 'D' and blank_pos < current_state.n: # Invalid move down
-                    continue
-                if move == 'U' and blank_pos >= current_state.n * (current_state.n - 1): # Invalid move up
-                    continue
-                if move == 'R' and blank_pos % current_state.n == 0: # Invalid move right
-                    continue
-                if move == 'L' and blank_pos % current_state.n == current_state.n - 1: # Invalid move left
+                # Entries superseded by a path with a lower g are dropped lazily
+                if best_node[key] != current:
+                    stats.stale_dropped += 1
                     continue
-                new_board = move_tile(current_state.board, move, blank_pos, current_state.moves)
 
-                if tuple(new_board) in closed_list:
-                    continue
+                if matched_column[current] == goal_matched:
+                    stats.finish()
+                    return nodes.build_state(current)
 
-                if heuristic == 'manhattan':
-                    new_state = PuzzleState(new_board,  self.n, current_state, move, current_state.depth + 1, current_state.depth + 1 + self.manhattan_distance_heuristic(new_board, colors_goal_positions))
-                elif heuristic == 'missplaced':
-                    new_state = PuzzleState(new_board,  self.n, current_state, move, current_state.depth + 1, current_state.depth + 1 + self.missplaced_tiles_heuristic(new_board, colors_goal_positions))
-                heapq.heappush(open_list, new_state)
+                stats.nodes_expanded += 1
+                if stats.nodes_expanded >= stats.next_progress:
+                    stats.peak_closed = len(best_node)
+                    stats.progress()
+                depth = g_column[current] + 1
+                current_h = f_column[current] - g_column[current]
+                for move, new_board, new_blank_pos, h, matched in expand_key(key, blank_column[current], current_h, matched_column[current], heuristic):
+                    stats.nodes_generated += 1
+                    previous = best_node.get(new_board)
+                    if previous is not None and g_column[previous] <= depth:
+                        stats.duplicates_pruned += 1
+                        continue
 
+                    child = nodes.add(new_board, current, move, depth, depth + h, new_blank_pos, matched)
+                    best_node[new_board] = child
+                    open_list.push(child, depth + h, depth, h)
+        finally:
+            stats.peak_closed = len(best_node)
+        stats.finish()
         return None
     
 
-    def IDA_star(self, heuristic):
-        start_state = self.initial_state
-        goal_state = self.goal_state
-        colors_goal_positions = self.calculate_colors_goal_positions(goal_state)
-
-        if heuristic == 'manhattan':
-            threshold = self.manhattan_distance_heuristic(start_state, colors_goal_positions)
-        elif heuristic == 'missplaced':
-            threshold = self.missplaced_tiles_heuristic(start_state, colors_goal_positions)
-        else:
+    # transposition_table_bytes caps the memory of an optional transposition table used to skip
+    # boards already reached at the same or a lower depth in the current iteration
+    def IDA_star(self, heuristic, transposition_table_bytes=None, replacement='depth'):
+        if heuristic not in self.heuristics:
             print("Invalid heuristic")
             return
+        transposition_table = None
+        if transposition_table_bytes is not None:
+            transposition_table = TranspositionTable(transposition_table_bytes, replacement)
+        stats = self.new_stats('IDA_star', heuristic)
+        engine = IDAStarEngine(self, heuristic, transposition_table, stats=stats)
+        threshold = engine.h
 
-        def search(current_state, threshold):
-            if heuristic == 'manhattan':
-                f = current_state.depth + self.manhattan_distance_heuristic(current_state.board, colors_goal_positions)
-            elif heuristic == 'missplaced':
-                f = current_state.depth + self.missplaced_tiles_heuristic(current_state.board, colors_goal_positions)
-
-            current_state_goal_positions = [current_state.board[i] for i in current_state.internal_matrix_index]
-            
-            if f > threshold:
-                return f, None
-            
-            if current_state_goal_positions == self.goal_state:
-                return f, current_state
-            
-            min_overflow = float('inf')
-            blank_pos = current_state.board.index("*")
-            
-            for move in current_state.moves:
-                if move == 'D' and blank_pos < current_state.n: # Invalid move down
-                    continue
-                if move == 'U' and blank_pos >= current_state.n * (current_state.n - 1): # Invalid move up
-                    continue
-                if move == 'R' and blank_pos % current_state.n == 0: # Invalid move right
-                    continue
-                if move == 'L' and blank_pos % current_state.n == current_state.n - 1: # Invalid move left
-                    continue
-                new_board = move_tile(current_state.board, move, blank_pos, current_state.moves)
-                new_state = PuzzleState(new_board, self.n, current_state, move, current_state.depth + 1, 0)  # Guardar bien el padre
-                new_threshold, result = search(new_state, threshold)
-                if result:
-                    return new_threshold, result
-                min_overflow = min(min_overflow, new_threshold)
-
-            return min_overflow, None
-        
         while True:
-            if heuristic == 'manhattan':
-                new_threshold, result = search(PuzzleState(start_state, self.n, None, None, 0, self.manhattan_distance_heuristic(start_state, colors_goal_positions)), threshold)
-            elif heuristic == 'missplaced':
-                new_threshold, result = search(PuzzleState(start_state, self.n, None, None, 0, self.missplaced_tiles_heuristic(start_state, colors_goal_positions)), threshold)
+            if transposition_table is not None:
+                transposition_table.new_iteration()
+            stats.iterations += 1
+            stats.thresholds.append(threshold)
+            new_threshold, found = engine.search(threshold)
 
-            if result:
-                return result, threshold
+            if found:
+                stats.finish()
+                return engine.solution(), threshold
             if new_threshold == float('inf'):
+                stats.finish()
                 return None, None
-            threshold = new_threshold
\ No newline at end of file
+            threshold = new_threshold
+
+    # Root split IDA* over a pool of worker processes, same results as IDA_star
+    def parallel_IDA_star(self, heuristic, workers=None):
+        if heuristic not in self.heuristics:
+            print("Invalid heuristic")
+            return
+        from parallel_ida import parallel_IDA_star
+        result = parallel_IDA_star(self, heuristic, workers)
+        self.stats.finish()
+        return result
+
+    # Hash distributed A* over worker processes, same results as a_star with an admissible heuristic
+    def hda_star(self, heuristic, workers=None):
+        if heuristic not in self.heuristics:
+            print("Invalid heuristic")
+            return None
+        from hda_star import hda_star
+        result = hda_star(self, heuristic, workers)
+        self.stats.finish()
+        return result
+
+    # Memory bounded A* (SMA* style): keeps at most max_nodes nodes, or as many as fit in
+    # max_bytes, dropping the worst leaves and regenerating them later if needed
+    def sma_star(self, heuristic, max_nodes=None, max_bytes=None):
+        if heuristic not in self.heuristics:
+            print("Invalid heuristic")
+            return None
+        from memory_bounded_search import MemoryBoundedSearch, estimate_node_bytes
+        if max_nodes is None:
+            if max_bytes is None:
+                raise ValueError('sma_star needs max_nodes or max_bytes')
+            max_nodes = max_bytes // estimate_node_bytes(self.initial_key)
+        search = MemoryBoundedSearch(self, heuristic, max_nodes, self.new_stats('sma_star', heuristic))
+        result = search.search()
+        search.stats.finish()
+        return result
+
+    # Anytime weighted A*: returns a first solution fast and improves it while lowering the weight
+    # from initial_weight to 1 by weight_step, until time_limit seconds have passed.
+    # on_solution(state, bound) is called for every improved solution with its suboptimality bound
+    # (None with a heuristic out of ADMISSIBLE_HEURISTICS, which gives no bound)
+    def anytime_a_star(self, heuristic, time_limit=None, initial_weight=3.0, weight_step=0.5, on_solution=None, tie_breaking='h'):
+        if heuristic not in self.heuristics:
+            print("Invalid heuristic")
+            return None
+        from anytime_search import AnytimeWeightedAStar
+        deadline = time.monotonic() + time_limit if time_limit is not None else None
+        search = AnytimeWeightedAStar(self, heuristic, heuristic in ADMISSIBLE_HEURISTICS, deadline, tie_breaking, on_solution,
+                                      self.new_stats('anytime_a_star', heuristic))
+        result = search.search(initial_weight, weight_step)
+        search.stats.finish()
+        return result
+
+    # A* expanding up to batch_size nodes of the lowest f at once with NumPy (table heuristics
+    # only), best first on f like a_star. NumPy is only imported when this search is used
+    def a_star_batched(self, heuristic, batch_size=256):
+        if heuristic not in self.heuristics:
+            print("Invalid heuristic")
+            return None
+        from batch_expansion import BatchedAStar
+        search = BatchedAStar(self, heuristic, batch_size, self.new_stats('a_star_batched', heuristic))
+        result = search.search()
+        search.stats.finish()
+        return result
@@ -1,7 +1,50 @@
+import argparse
+import json
+import signal
+import sys
 from board import generate_initial_state_from_file, generate_goal_state_from_file, get_n_value_from_file
-from informed_search import AStarSearchGraph
+from informed_search import AStarSearchGraph, SERIAL_SEARCHES, HEURISTICS
+
+# Streaming mode: one instance per input line in the one line form of reader.parse_state_line
+# ('VBRA*...ZNV VBRANZVBR'), one JSON Lines record per instance, written and flushed as soon as it
+# is solved. The graphs of the recent goals (goal tables, pattern databases, caches) stay warm
+# between lines, so a long lived process only pays for the searches, and with a SolutionCache
+# not even for those of the instances already solved. The batch module is only imported here, so
+# solving the sample files does not load it
+def stream_solve(lines, output, algorithm, heuristic, time_limit=None, memory_limit=None, cache=None):
+    from batch import handle_alarm, load_state_line, solve_record
+    signal.signal(signal.SIGALRM, handle_alarm)
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        record = {'line': line_number, 'algorithm': algorithm, 'heuristic': heuristic}
+        solve_record(record, lambda: load_state_line(line), algorithm, heuristic, time_limit, memory_limit, cache)
+        output.write(json.dumps(record) + '\n')
+        output.flush()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rubik\'s Race solver')
+    parser.add_argument('--stream', action='store_true', help='solve the instances read from stdin, one per line, and write JSON Lines to stdout')
+    parser.add_argument('--algorithm', choices=SERIAL_SEARCHES, default='IDA_star')
+    parser.add_argument('--heuristic', choices=HEURISTICS, default='manhattan')
+    parser.add_argument('--time-limit', type=float, default=None, help='seconds per instance (stream mode)')
+    parser.add_argument('--memory-limit', type=float, default=None, help='address space per instance in MB (stream mode)')
+    parser.add_argument('--cache', default=None, help='SQLite solution cache file (stream mode)')
+    parser.add_argument('--cache-size', type=int, default=None, help='solutions kept in the cache (default: solution_cache.DEFAULT_MAX_ENTRIES)')
+    args = parser.parse_args()
+
+    if args.stream:
+        cache = None
+        if args.cache:
+            from solution_cache import SolutionCache, DEFAULT_MAX_ENTRIES
+            cache = SolutionCache(args.cache, args.cache_size if args.cache_size is not None else DEFAULT_MAX_ENTRIES)
+        stream_solve(sys.stdin, sys.stdout, args.algorithm, args.heuristic, args.time_limit, args.memory_limit, cache)
+        if cache is not None:
+            print(json.dumps(cache.as_dict()), file=sys.stderr)
+            cache.close()
+        sys.exit(0)
+
     file_name_initial = 'inicial.txt'
     file_name_meta = 'meta.txt'
 
@@ -9,15 +52,14 @@ if __name__ == '__main__':
     goal_state = generate_goal_state_from_file(file_name_meta)
     n = get_n_value_from_file(file_name_initial)
 
-    heuristic = 'manhattan'
+    heuristic = args.heuristic
 
     a_star = AStarSearchGraph(initial_state, goal_state, n)
-    #result = a_star.a_star(heuristic)
-    result2, limit = a_star.IDA_star(heuristic)
+    result2, stats = a_star.solve(args.algorithm, heuristic)
 
 
     if result2:
         print("Goal state reached!")
         result2.print_solution()
     else:
-        print("No solution found")
\ No newline at end of file
+        print("No solution found")
@@ -0,0 +1,181 @@
+import heapq
+import sys
+
+""" Memory bounded A* in the style of SMA*.
+
+At most max_nodes nodes are kept in memory. When the budget is exceeded the worst leaf (highest
+f, shallowest among equal f) is dropped and its f is backed up into its parent, which goes back
+to the open list with the lowest f of its forgotten children and regenerates them when popped.
+f values use pathmax (a child never has a lower f than its parent), so the open list always
+holds a lower bound of every solution not yet found and the first goal popped is optimal with
+an admissible heuristic. The cost of the memory ceiling is regenerating forgotten subtrees. """
+
+# Smallest budget accepted, the current path and its siblings must fit in memory
+MIN_NODES = 64
+
+class SMANode:
+    __slots__ = ('key', 'blank_pos', 'g', 'h', 'f', 'matched', 'parent', 'move',
+                 'children', 'forgotten', 'expanded', 'alive', 'version')
+
+    def __init__(self, key, blank_pos, g, h, f, matched, parent, move):
+        self.key = key
+        self.blank_pos = blank_pos
+        self.g = g
+        self.h = h
+        self.f = f
+        self.matched = matched
+        self.parent = parent
+        self.move = move
+        self.children = 0  # Children currently in memory
+        self.forgotten = None  # Move -> backed up f of the children dropped from memory
+        self.expanded = False
+        self.alive = True
+        self.version = 0  # Bumped whenever the heap entries of the node become outdated
+
+# Rough size of a node with its board key and heap entries, to turn a byte budget into nodes
+def estimate_node_bytes(key):
+    node = SMANode(key, 0, 0, 0, 0, 0, None, None)
+    entry = (0, 0, 0, 0, node)
+    return sys.getsizeof(node) + sys.getsizeof(key) + 2 * (sys.getsizeof(entry) + 8)
+
+class MemoryBoundedSearch:
+    def __init__(self, graph, heuristic, max_nodes, stats):
+        if max_nodes < MIN_NODES:
+            raise ValueError(f'The memory bounded search needs a budget of at least {MIN_NODES} nodes')
+        self.graph = graph
+        self.heuristic = heuristic
+        self.max_nodes = max_nodes
+        self.goal_matched = len(graph.internal_matrix_index)
+        self.open_heap = []  # (f, -g, sequence, version, node): best node first
+        self.worst_heap = []  # (-f, g, sequence, version, node): worst leaf first
+        self.sequence = 0
+        self.node_count = 0
+        self.stats = stats
+        if stats.profile:
+            self.expand = stats.time_expansion(self.expand)
+            self.push_open = stats.time_queue(self.push_open)
+            self.pop_best = stats.time_queue(self.pop_best)
+
+    def push_open(self, node, f):
+        self.sequence += 1
+        heapq.heappush(self.open_heap, (f, -node.g, self.sequence, node.version, node))
+        if node.children == 0:
+            heapq.heappush(self.worst_heap, (-f, node.g, self.sequence, node.version, node))
+
+    def add_child(self, parent, move, key, blank_pos, h, matched, f):
+        node = SMANode(key, blank_pos, parent.g + 1, h, f, matched, parent, move)
+        parent.children += 1
+        self.node_count += 1
+        self.stats.nodes_generated += 1
+        self.push_open(node, f)
+
+    def pop_best(self):
+        while self.open_heap:
+            f, g, sequence, version, node = heapq.heappop(self.open_heap)
+            if node.alive and node.version == version:
+                node.version += 1
+                return node, f
+        return None, None
+
+    # Drops the worst leaf from memory and backs its f up into its parent
+    def forget_worst_leaf(self, protected):
+        while self.worst_heap:
+            f, g, sequence, version, node = heapq.heappop(self.worst_heap)
+            if not node.alive or node.version != version or node.children or node.parent is None or node is protected:
+                continue
+            parent = node.parent
+            node.alive = False
+            self.node_count -= 1
+            self.stats.nodes_forgotten += 1
+            if parent.forgotten is None:
+                parent.forgotten = {}
+            parent.forgotten[node.move] = -f
+            parent.children -= 1
+            backed_up_f = min(parent.forgotten.values())
+            if parent.children == 0:
+                # The parent is a leaf again, its f is the best of what it forgot
+                parent.f = max(parent.f, backed_up_f)
+            parent.version += 1
+            self.push_open(parent, backed_up_f)
+            return True
+        return False
+
+    # Releases an expanded node none of whose children are left (dead end), and its ancestors that
+    # become dead ends in turn. An ancestor left with forgotten children only is a leaf again
+    def release_dead_end(self, node):
+        while node.parent is not None and node.children == 0 and not node.forgotten:
+            parent = node.parent
+            node.alive = False
+            self.node_count -= 1
+            parent.children -= 1
+            if parent.children:
+                return
+            if parent.forgotten:
+                backed_up_f = min(parent.forgotten.values())
+                parent.f = max(parent.f, backed_up_f)
+                parent.version += 1
+                self.push_open(parent, backed_up_f)
+                return
+            node = parent
+
+    def expand(self, node):
+        graph = self.graph
+        stats = self.stats
+        stats.nodes_expanded += 1
+        if stats.nodes_expanded >= stats.next_progress:
+            stats.progress()
+        forgotten = node.forgotten
+        node.forgotten = None
+        previous_blank_pos = node.parent.blank_pos if node.parent is not None else -1
+        for move, key, blank_pos, h, matched in graph.expand_key(node.key, node.blank_pos, node.h, node.matched, self.heuristic):
+            if blank_pos == previous_blank_pos:
+                continue
+            if node.expanded:
+                # Regenerating: only the children that were forgotten, with their backed up f
+                if forgotten is None or move not in forgotten:
+                    continue
+                f = max(forgotten[move], node.g + 1 + h)
+            else:
+                f = max(node.f, node.g + 1 + h)
+            self.add_child(node, move, key, blank_pos, h, matched, f)
+        node.expanded = True
+
+    def search(self):
+        graph = self.graph
+        start_state = graph.create_initial_state(self.heuristic)
+        root = SMANode(start_state.key, start_state.blank_pos, 0, start_state.h, start_state.h, start_state.matched, None, None)
+        self.node_count = 1
+        self.push_open(root, root.f)
+
+        while True:
+            node, f = self.pop_best()
+            if node is None:
+                return None
+            if self.node_count > self.stats.peak_nodes:
+                self.stats.peak_nodes = self.node_count
+
+            if not node.expanded and node.matched == self.goal_matched:
+                return self.build_solution(node)
+
+            self.expand(node)
+            if node.children == 0:
+                self.release_dead_end(node)
+            while self.node_count > self.max_nodes:
+                if not self.forget_worst_leaf(node):
+                    break
+
+            # Stale heap entries are compacted so they stay proportional to the budget
+            if len(self.open_heap) > 4 * self.max_nodes:
+                self.open_heap = [entry for entry in self.open_heap if entry[4].alive and entry[4].version == entry[3]]
+                heapq.heapify(self.open_heap)
+            if len(self.worst_heap) > 4 * self.max_nodes:
+                self.worst_heap = [entry for entry in self.worst_heap if entry[4].alive and entry[4].version == entry[3] and not entry[4].children]
+                heapq.heapify(self.worst_heap)
+
+    def build_solution(self, node):
+        moves = []
+        while node.parent is not None:
+            moves.append(node.move)
+            node = node.parent
+        moves.reverse()
+        return self.graph.replay_moves(moves, self.heuristic)
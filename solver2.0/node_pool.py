@@ -0,0 +1,56 @@
+from array import array
+from core import PuzzleState
+
+""" Struct of arrays storage for search nodes.
+
+A node is an index into parallel columns instead of an object: the bit-packed board, the index
+of its parent, the code of the move that reached it, g, f, the blank position and the number of
+matched goal cells. Parent links are plain integers, so nothing keeps the expanded part of the
+tree alive but the columns themselves. """
+
+MOVES = ('D', 'U', 'R', 'L')
+move_codes = {move: code for code, move in enumerate(MOVES)}
+
+NO_PARENT = -1
+NO_MOVE = 255
+
+class NodePool:
+    def __init__(self, n):
+        self.n = n
+        self.keys = []
+        self.parents = array('i')
+        self.move_codes = bytearray()
+        self.g = array('H')
+        self.f = array('H')
+        self.blank_positions = array('H')
+        self.matched = array('H')
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key, parent, move, g, f, blank_pos, matched):
+        self.keys.append(key)
+        self.parents.append(parent)
+        self.move_codes.append(NO_MOVE if move is None else move_codes[move])
+        self.g.append(g)
+        self.f.append(f)
+        self.blank_positions.append(blank_pos)
+        self.matched.append(matched)
+        return len(self.keys) - 1
+
+    def get_h(self, index):
+        return self.f[index] - self.g[index]
+
+    # Builds the PuzzleState chain from the root to the node
+    def build_state(self, index):
+        path = []
+        while index != NO_PARENT:
+            path.append(index)
+            index = self.parents[index]
+        state = None
+        for index in reversed(path):
+            code = self.move_codes[index]
+            move = None if code == NO_MOVE else MOVES[code]
+            h = self.get_h(index)
+            state = PuzzleState(self.keys[index], self.n, state, move, self.g[index], self.f[index], self.blank_positions[index], h, self.matched[index])
+        return state
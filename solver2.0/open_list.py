@@ -0,0 +1,75 @@
+""" Bucketed priority queue for A* open lists with small integer costs.
+
+Items are stored in LIFO buckets indexed by f and, inside every f, by a tie breaking value, so
+push and pop are O(1) amortized and never compare items. Tie breaking policies:
+    'h'    lowest h first (deepest nodes first among equal f)
+    'g'    lowest g first (shallowest nodes first among equal f)
+    'lifo' no tie breaking, last pushed first """
+
+TIE_BREAKING = ('h', 'g', 'lifo')
+
+class BucketOpenList:
+    def __init__(self, tie_breaking='h'):
+        if tie_breaking not in TIE_BREAKING:
+            raise ValueError(f'Invalid tie breaking: {tie_breaking}, must be one of {TIE_BREAKING}')
+        self.tie_breaking = tie_breaking
+        self.buckets = []  # buckets[f][tie] -> list used as a stack
+        self.counts = []  # Number of items in buckets[f]
+        self.min_ties = []  # Lower bound of the first non empty tie of buckets[f]
+        self.min_f = 0  # Lower bound of the first non empty f
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, item, f, g, h):
+        if self.tie_breaking == 'h':
+            tie = h
+        elif self.tie_breaking == 'g':
+            tie = g
+        else:
+            tie = 0
+        while len(self.buckets) <= f:
+            self.buckets.append([])
+            self.counts.append(0)
+            self.min_ties.append(0)
+        bucket = self.buckets[f]
+        while len(bucket) <= tie:
+            bucket.append([])
+        bucket[tie].append(item)
+
+        if self.counts[f] == 0 or tie < self.min_ties[f]:
+            self.min_ties[f] = tie
+        self.counts[f] += 1
+        if self.size == 0 or f < self.min_f:
+            self.min_f = f
+        self.size += 1
+
+    # Items in no particular order
+    def __iter__(self):
+        for bucket in self.buckets:
+            for items in bucket:
+                yield from items
+
+    # Smallest f in the open list
+    def min_cost(self):
+        if self.size == 0:
+            raise IndexError('min_cost of an empty open list')
+        f = self.min_f
+        while self.counts[f] == 0:
+            f += 1
+        self.min_f = f
+        return f
+
+    def pop(self):
+        if self.size == 0:
+            raise IndexError('pop from an empty open list')
+        f = self.min_cost()
+        bucket = self.buckets[f]
+        tie = self.min_ties[f]
+        while not bucket[tie]:
+            tie += 1
+        self.min_ties[f] = tie
+        self.counts[f] -= 1
+        self.size -= 1
+        return bucket[tie].pop()
@@ -0,0 +1,107 @@
+import multiprocessing
+from ida_engine import IDAStarEngine
+from stats import SearchStats
+
+""" Root split parallel IDA*.
+
+The first plies from the start state are expanded breadth first into a list of subtree roots.
+Every IDA* iteration searches all the subtrees with the same threshold in a process pool; the
+next threshold is the minimum overflow returned by the workers. A solution found in the
+iteration with threshold t costs exactly t (no solution was found with the previous, smaller
+thresholds), so the first one reported is optimal and the remaining workers are cancelled. """
+
+# Subtree roots generated per worker before the iterations start
+TASKS_PER_WORKER = 8
+
+# Deepest ply expanded to build the subtree roots
+MAX_SPLIT_DEPTH = 12
+
+# Worker side graph, built once per process by init_worker
+worker_graph = None
+worker_heuristic = None
+
+def init_worker(initial_state, goal_state, n, pattern_database_dir, heuristic):
+    global worker_graph, worker_heuristic
+    # Imported here so the pool can be created from informed_search itself
+    from informed_search import AStarSearchGraph
+    worker_graph = AStarSearchGraph(initial_state, goal_state, n, pattern_database_dir)
+    worker_heuristic = heuristic
+
+# Returns (minimum f over the threshold, moves from the subtree root or None, subtree SearchStats)
+def search_subtree(task):
+    root_key, root_depth, previous_blank_pos, threshold = task
+    stats = SearchStats('IDA_star', worker_heuristic)
+    engine = IDAStarEngine(worker_graph, worker_heuristic, root_key=root_key, root_depth=root_depth, previous_blank_pos=previous_blank_pos, stats=stats)
+    new_threshold, found = engine.search(threshold)
+    return new_threshold, engine.get_moves() if found else None, stats
+
+# Breadth first expansion of the first plies. Returns (moves, None) when a goal is found on the
+# way (breadth first, so with the fewest moves) or (None, roots) where every root is
+# (key, blank position, parent blank position, moves from the start)
+def split_root(graph, heuristic, min_roots, stats):
+    start_state = graph.create_initial_state(heuristic)
+    goal_matched = len(graph.internal_matrix_index)
+    if start_state.matched == goal_matched:
+        return [], None
+
+    seen = {start_state.key}
+    roots = [(start_state, -1, [])]
+    depth = 0
+    while len(roots) < min_roots and depth < MAX_SPLIT_DEPTH:
+        next_roots = []
+        for state, previous_blank_pos, moves in roots:
+            stats.nodes_expanded += 1
+            for move, key, blank_pos, h, matched in graph.expand(state, heuristic):
+                stats.nodes_generated += 1
+                if key in seen:
+                    stats.duplicates_pruned += 1
+                    continue
+                seen.add(key)
+                if matched == goal_matched:
+                    return moves + [move], None
+                child = graph.create_state(key, state, move, blank_pos, h, matched)
+                next_roots.append((child, state.blank_pos, moves + [move]))
+        if not next_roots:
+            break
+        roots = next_roots
+        depth += 1
+    return None, [(state.key, state.blank_pos, previous_blank_pos, moves) for state, previous_blank_pos, moves in roots]
+
+def parallel_IDA_star(graph, heuristic, workers=None):
+    workers = workers or multiprocessing.cpu_count()
+    stats = graph.new_stats('parallel_IDA_star', heuristic)
+    moves, roots = split_root(graph, heuristic, workers * TASKS_PER_WORKER, stats)
+    if moves is not None:
+        return graph.replay_moves(moves, heuristic), len(moves)
+    if not roots:
+        return None, None
+
+    root_depth = len(roots[0][3])
+    threshold = graph.heuristics[heuristic](graph.initial_key)
+    pool = multiprocessing.Pool(workers, initializer=init_worker,
+                                initargs=(graph.initial_state, graph.goal_state, graph.n, graph.pattern_database_dir, heuristic))
+    try:
+        while True:
+            stats.iterations += 1
+            stats.thresholds.append(threshold)
+            tasks = [(key, root_depth, previous_blank_pos, threshold) for key, blank_pos, previous_blank_pos, moves in roots]
+            min_overflow = float('inf')
+            # Results carry the index of their root so the solution path can be rebuilt
+            for index, (new_threshold, subtree_moves, subtree_stats) in pool.imap_unordered(search_indexed_subtree, enumerate(tasks)):
+                stats.merge(subtree_stats)
+                if stats.nodes_expanded >= stats.next_progress:
+                    stats.progress()
+                if subtree_moves is not None:
+                    return graph.replay_moves(roots[index][3] + subtree_moves, heuristic), threshold
+                min_overflow = min(min_overflow, new_threshold)
+            if min_overflow == float('inf'):
+                return None, None
+            threshold = min_overflow
+    finally:
+        # Cancels the workers still searching other subtrees
+        pool.terminate()
+        pool.join()
+
+def search_indexed_subtree(indexed_task):
+    index, task = indexed_task
+    return index, search_subtree(task)
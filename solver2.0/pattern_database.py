@@ -0,0 +1,171 @@
+import fcntl
+import mmap
+import os
+import struct
+from collections import deque
+from itertools import combinations
+from reader import path
+from core import get_internal_matrix_index, color_codes, BITS_PER_CELL, CELL_MASK
+
+""" Additive pattern database heuristic.
+
+Every goal color is an abstract sub-problem: only the blank and the tiles of that color are
+tracked, and only moves of those tiles are counted (the blank moves freely over the others).
+The exact distances of every sub-problem are summed, which keeps the heuristic admissible
+because each real move moves a single tile. """
+
+MAGIC = b'RPDB'
+VERSION = 1
+UNREACHABLE = 255
+
+# Pattern databases larger than this (in entries per color) are refused
+MAX_TABLE_SIZE = 50_000_000
+
+default_cache_dir = os.path.join(path, 'data', 'pdb')
+
+def binomial_table(m, k):
+    table = [[0] * (k + 1) for _ in range(m + 1)]
+    for i in range(m + 1):
+        table[i][0] = 1
+        for j in range(1, min(i, k) + 1):
+            table[i][j] = table[i - 1][j - 1] + table[i - 1][j]
+    return table
+
+def get_cache_file_name(goal_state, n):
+    goal_name = ''.join(str(color_codes[color]) for color in goal_state)
+    return f'pdb_{n}_{goal_name}.bin'
+
+class PatternDatabase:
+    def __init__(self, goal_state, n, cache_dir=None):
+        self.n = n
+        self.cells = n * n
+        self.tiles_per_color = (self.cells - 1) // 6
+        self.binomial = binomial_table(self.cells, self.tiles_per_color)
+        self.combinations_count = self.binomial[self.cells][self.tiles_per_color]
+        self.table_size = self.cells * self.combinations_count
+        if self.table_size > MAX_TABLE_SIZE:
+            raise ValueError(f'A pattern database for a {n}x{n} board needs {self.table_size} entries per color')
+
+        # Goal cells (in board coordinates) of every color present in the goal
+        self.goal_cells = {}
+        for i, index in enumerate(get_internal_matrix_index(n)):
+            code = color_codes[goal_state[i]]
+            if code != color_codes['*']:
+                self.goal_cells.setdefault(code, []).append(index)
+        self.pattern_codes = sorted(self.goal_cells)
+
+        cache_dir = cache_dir if cache_dir is not None else default_cache_dir
+        self.file_name = os.path.join(cache_dir, get_cache_file_name(goal_state, n))
+        if not os.path.exists(self.file_name):
+            self.build(self.file_name)
+        self.load(self.file_name)
+
+    def rank(self, blank_pos, positions):
+        combination_rank = 0
+        for j, position in enumerate(positions):
+            combination_rank += self.binomial[position][j + 1]
+        return blank_pos * self.combinations_count + combination_rank
+
+    # 0-1 breadth first search from every abstract goal: moving a pattern tile costs 1,
+    # moving the blank over any other tile costs 0
+    def build_table(self, code):
+        n = self.n
+        goal_cells = set(self.goal_cells[code])
+        distances = bytearray([UNREACHABLE]) * self.table_size
+        queue = deque()
+
+        for positions in combinations(range(self.cells), self.tiles_per_color):
+            if not goal_cells.issubset(positions):
+                continue
+            for blank_pos in range(self.cells):
+                if blank_pos in positions:
+                    continue
+                distances[self.rank(blank_pos, positions)] = 0
+                queue.append((0, blank_pos, positions))
+
+        while queue:
+            distance, blank_pos, positions = queue.popleft()
+            if distances[self.rank(blank_pos, positions)] != distance:
+                continue
+            row, column = divmod(blank_pos, n)
+            neighbors = []
+            if row > 0:
+                neighbors.append(blank_pos - n)
+            if row < n - 1:
+                neighbors.append(blank_pos + n)
+            if column > 0:
+                neighbors.append(blank_pos - 1)
+            if column < n - 1:
+                neighbors.append(blank_pos + 1)
+
+            for neighbor in neighbors:
+                if neighbor in positions:
+                    new_positions = tuple(sorted(blank_pos if position == neighbor else position for position in positions))
+                    new_distance = distance + 1
+                else:
+                    new_positions = positions
+                    new_distance = distance
+                new_rank = self.rank(neighbor, new_positions)
+                if new_distance < distances[new_rank]:
+                    distances[new_rank] = min(new_distance, UNREACHABLE - 1)
+                    if new_distance == distance:
+                        queue.appendleft((new_distance, neighbor, new_positions))
+                    else:
+                        queue.append((new_distance, neighbor, new_positions))
+        return distances
+
+    # File layout: magic, version, n, tiles per color, number of patterns, the pattern color
+    # codes and then one table of table_size bytes per pattern
+    def build(self, file_name):
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        # Processes missing the same database (workers of a batch on a cold cache) build it once:
+        # the first one to take the lock builds it, the others wait and then find it built
+        with open(f'{file_name}.lock', 'wb') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if os.path.exists(file_name):
+                return
+            temporary_file_name = f'{file_name}.{os.getpid()}.tmp'
+            try:
+                with open(temporary_file_name, 'wb') as file:
+                    file.write(MAGIC)
+                    file.write(struct.pack('BBBB', VERSION, self.n, self.tiles_per_color, len(self.pattern_codes)))
+                    file.write(bytes(self.pattern_codes))
+                    for code in self.pattern_codes:
+                        file.write(self.build_table(code))
+                # Replaced atomically so concurrent solvers never map a half written file
+                os.replace(temporary_file_name, file_name)
+            finally:
+                # Left behind when the build is interrupted (a timeout of the batch solver)
+                if os.path.exists(temporary_file_name):
+                    os.remove(temporary_file_name)
+
+    def load(self, file_name):
+        with open(file_name, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self.data[:8]
+        version, n, tiles_per_color, count = struct.unpack('BBBB', header[4:8])
+        if header[:4] != MAGIC or version != VERSION or n != self.n or tiles_per_color != self.tiles_per_color:
+            raise ValueError(f'Invalid pattern database file: {file_name}')
+        codes = list(self.data[8:8 + count])
+        if codes != self.pattern_codes:
+            raise ValueError(f'Invalid pattern database file: {file_name}')
+        self.offsets = {code: 8 + count + i * self.table_size for i, code in enumerate(codes)}
+
+    def close(self):
+        self.data.close()
+
+    def heuristic(self, key):
+        positions = {code: [] for code in self.pattern_codes}
+        blank_pos = 0
+        for i in range(self.cells):
+            code = key & CELL_MASK
+            key >>= BITS_PER_CELL
+            if code == 0:
+                blank_pos = i
+            elif code in positions:
+                positions[code].append(i)
+
+        total = 0
+        for code, offset in self.offsets.items():
+            total += self.data[offset + self.rank(blank_pos, positions[code])]
+        return total
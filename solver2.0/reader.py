@@ -1,3 +1,4 @@
+import math
 import os
 
 """" This module is responsible for reading the input file and returning the data in a structured format. """
@@ -10,4 +11,16 @@ def read_input_file(file_name):
         state = [list(line.strip()) for line in file]
     file.close()
     return state
-    
\ No newline at end of file
+    
+
+# One line form of an instance: the cells of the board and of the goal row by row, separated by
+# a space ('VBRA*...ZNV VBRANZVBR'). Returns both as read_input_file would read their files
+def parse_state_line(line):
+    fields = line.split()
+    if len(fields) != 2:
+        raise ValueError(f'Expected the board and the goal separated by a space: {line.strip()!r}')
+    board, goal = fields
+    n = math.isqrt(len(board))
+    if n * n != len(board) or len(goal) != (n - 2) * (n - 2):
+        raise ValueError(f'Invalid board or goal size: {line.strip()!r}')
+    return [list(board[i * n:(i + 1) * n]) for i in range(n)], [list(goal[i * (n - 2):(i + 1) * (n - 2)]) for i in range(n - 2)]
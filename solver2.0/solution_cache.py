@@ -0,0 +1,199 @@
+import sqlite3
+import time
+from informed_search import ADMISSIBLE_HEURISTICS
+
+""" Persistent solution cache in front of AStarSearchGraph, stored in SQLite.
+
+Instances are keyed by a canonical form of (initial board, goal), so instances that only differ
+by a rotation or mirror of the board (the 8 symmetries of the square, applied to the board and
+the goal alike) or by a relabeling of the colors share one entry. The canonical form relabels the
+colors in order of first appearance and keeps the smallest string over the 8 symmetries; the
+moves are stored in the orientation of the canonical form and turned back into the orientation
+of every instance that hits them.
+
+A solution is only known to be optimal when an optimal search found it with one of the
+ADMISSIBLE_HEURISTICS. Those solutions replace any other, which may be longer, and lookups that
+ask for an optimal solution ignore entries not known to be optimal. When the cache
+holds more than max_entries solutions, the least recently used ones are evicted. """
+
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+# Evictions remove this fraction of max_entries more than needed, so they run once per many stores
+EVICTION_SLACK = 0.05
+
+# Searches whose solutions are optimal with the ADMISSIBLE_HEURISTICS
+OPTIMAL_SEARCHES = ('a_star', 'a_star_batched', 'IDA_star', 'parallel_IDA_star', 'hda_star', 'sma_star')
+
+def is_optimal(algorithm, heuristic):
+    return algorithm in OPTIMAL_SEARCHES and heuristic in ADMISSIBLE_HEURISTICS
+
+# Direction (row, column) in which every move slides its tile (the blank goes the other way)
+MOVE_DIRECTIONS = {'D': (1, 0), 'U': (-1, 0), 'R': (0, 1), 'L': (0, -1)}
+
+# The 8 symmetries of a square of size n: (row, column) -> (row, column)
+SYMMETRIES = (
+    lambda r, c, n: (r, c),
+    lambda r, c, n: (c, n - 1 - r),
+    lambda r, c, n: (n - 1 - r, n - 1 - c),
+    lambda r, c, n: (n - 1 - c, r),
+    lambda r, c, n: (r, n - 1 - c),
+    lambda r, c, n: (n - 1 - r, c),
+    lambda r, c, n: (c, r),
+    lambda r, c, n: (n - 1 - c, n - 1 - r)
+)
+
+# Per board size: (board permutation, goal permutation, move map) of every symmetry, where
+# transformed[i] = cells[permutation[i]] and the move map turns the moves of the instance into
+# the moves of the transformed instance
+symmetry_tables = {}
+
+def square_permutation(symmetry, n):
+    permutation = [0] * (n * n)
+    for r in range(n):
+        for c in range(n):
+            new_r, new_c = symmetry(r, c, n)
+            permutation[new_r * n + new_c] = r * n + c
+    return permutation
+
+def get_symmetry_tables(n):
+    tables = symmetry_tables.get(n)
+    if tables is None:
+        tables = []
+        for symmetry in SYMMETRIES:
+            # Symmetries of the board map its centre onto itself, so the goal follows the same one
+            move_map = {}
+            origin = symmetry(1, 1, n)
+            for move, (dr, dc) in MOVE_DIRECTIONS.items():
+                target = symmetry(1 + dr, 1 + dc, n)
+                direction = (target[0] - origin[0], target[1] - origin[1])
+                move_map[move] = next(name for name, other in MOVE_DIRECTIONS.items() if other == direction)
+            tables.append((square_permutation(symmetry, n), square_permutation(symmetry, n - 2), move_map))
+        symmetry_tables[n] = tables
+    return tables
+
+# Colors renamed '1', '2', ... in order of first appearance, the blank is always '0'
+def relabel_colors(cells):
+    labels = {'*': '0'}
+    for color in cells:
+        if color not in labels:
+            labels[color] = str(len(labels))
+    return ''.join(labels[color] for color in cells)
+
+# (canonical key, move map from the instance to the canonical form)
+def canonicalize(initial_state, goal_state, n):
+    best = None
+    for board_permutation, goal_permutation, move_map in get_symmetry_tables(n):
+        cells = [initial_state[i] for i in board_permutation] + [goal_state[i] for i in goal_permutation]
+        key = f'{n}:{relabel_colors(cells)}'
+        if best is None or key < best[0]:
+            best = (key, move_map)
+    return best
+
+class SolutionCache:
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        if max_entries < 1:
+            raise ValueError('max_entries must be at least 1')
+        self.path = path
+        self.max_entries = max_entries
+        # Workers of a batch share the file: waits on locks instead of failing
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS solutions (
+            key TEXT PRIMARY KEY,
+            moves TEXT NOT NULL,
+            optimal INTEGER NOT NULL,
+            last_used REAL NOT NULL,
+            algorithm TEXT,
+            heuristic TEXT)''')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)')
+        self.connection.commit()
+        self.entries = self.count_entries()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self):
+        return {'entries': self.entries, 'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate,
+                'stores': self.stores, 'evictions': self.evictions}
+
+    def count_entries(self):
+        return self.connection.execute('SELECT COUNT(*) FROM solutions').fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    # Returns the cached solution of the graph instance as a PuzzleState chain, or None. A hit
+    # leaves in graph.stats the SearchStats of a search that expanded nothing
+    def lookup(self, graph, algorithm, heuristic):
+        key, move_map = canonicalize(graph.initial_state, graph.goal_state, graph.n)
+        row = self.connection.execute('SELECT moves, optimal FROM solutions WHERE key = ?', (key,)).fetchone()
+        if row is None or (is_optimal(algorithm, heuristic) and not row[1]):
+            self.misses += 1
+            return None
+
+        inverse_map = {canonical: move for move, canonical in move_map.items()}
+        moves = [inverse_map[move] for move in row[0]]
+        # The chain is built with a table heuristic when the requested one is not, so a hit
+        # never pays for building a pattern database
+        replay_heuristic = heuristic if heuristic in graph.heuristic_tables else 'manhattan'
+        try:
+            result = graph.replay_moves(moves, replay_heuristic)
+        except ValueError:
+            result = None
+        if result is None or not graph.is_goal(result.key):
+            # Entry that does not solve the instance (edited or corrupted file): searched again
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        with self.connection:
+            self.connection.execute('UPDATE solutions SET last_used = ? WHERE key = ?', (time.time(), key))
+        graph.new_stats(algorithm, heuristic).finish()
+        return result
+
+    # Stores the moves solving the graph instance, found by the algorithm with the heuristic
+    def store(self, graph, algorithm, heuristic, moves):
+        key, move_map = canonicalize(graph.initial_state, graph.goal_state, graph.n)
+        canonical_moves = ''.join(move_map[move] for move in moves)
+        optimal = int(is_optimal(algorithm, heuristic))
+        with self.connection:
+            row = self.connection.execute('SELECT moves, optimal FROM solutions WHERE key = ?', (key,)).fetchone()
+            if row is not None and (row[1] > optimal or (row[1] == optimal and len(row[0]) <= len(canonical_moves))):
+                return
+            self.connection.execute('INSERT OR REPLACE INTO solutions (key, moves, optimal, last_used, algorithm, heuristic) VALUES (?, ?, ?, ?, ?, ?)',
+                                    (key, canonical_moves, optimal, time.time(), algorithm, heuristic))
+        self.stores += 1
+        if row is None:
+            self.entries += 1
+            if self.entries > self.max_entries:
+                self.evict()
+
+    # Evicts the least recently used entries down to max_entries minus the slack. Other processes
+    # may have stored entries too, so the table is counted first
+    def evict(self):
+        with self.connection:
+            self.entries = self.count_entries()
+            excess = self.entries - self.max_entries
+            if excess <= 0:
+                return
+            excess = min(self.entries, excess + int(self.max_entries * EVICTION_SLACK))
+            self.connection.execute('DELETE FROM solutions WHERE key IN (SELECT key FROM solutions ORDER BY last_used LIMIT ?)', (excess,))
+        self.entries -= excess
+        self.evictions += excess
+
+    # graph.solve behind the cache: returns (solution state or None, SearchStats)
+    def solve(self, graph, algorithm, heuristic, **options):
+        result = self.lookup(graph, algorithm, heuristic)
+        if result is not None:
+            return result, graph.stats
+        result, stats = graph.solve(algorithm, heuristic, **options)
+        if result is not None:
+            self.store(graph, algorithm, heuristic, result.get_solution_moves())
+        return result, stats
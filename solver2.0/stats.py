@@ -0,0 +1,131 @@
+import time
+
+""" Counters and timings collected by the searches of AStarSearchGraph.
+
+Every search leaves a SearchStats in graph.stats (AStarSearchGraph.solve also returns it).
+on_progress(stats) is called every progress_interval expansions while the search runs. With
+profile=True the time spent in the heuristic, in the expansion of nodes and in the open list is
+measured too; it is off by default because timing every call slows the search down.
+
+Not every search fills every field:
+- a_star, a_star_batched: node counts, stale_dropped, peak_open, peak_closed and the times;
+  anytime_a_star the same plus iterations
+- sma_star: nodes_expanded, nodes_generated, peak_nodes, nodes_forgotten and the times
+- IDA_star, parallel_IDA_star: node counts, iterations and thresholds. They keep no open list or
+  closed table (peaks, stale_dropped and queue_time stay 0) and expand nodes in place in
+  IDAStarEngine, so expansion_time stays 0 too; heuristic_time is only measured for the
+  heuristics without a table (pattern_database, assignment), the others are updated incrementally
+- hda_star: node counts, stale_dropped, peak_open and peak_closed, summed over the workers (which
+  hold disjoint parts of the space); no times, the workers are not profiled
+Searches interrupted by a deadline or a timeout leave the counts and peaks reached so far. """
+
+# Expansions between two calls of on_progress
+PROGRESS_INTERVAL = 10_000
+
+# Values reported by as_dict, in order
+FIELDS = ('algorithm', 'heuristic', 'nodes_expanded', 'nodes_generated', 'duplicates_pruned', 'stale_dropped',
+          'peak_open', 'peak_closed', 'peak_nodes', 'nodes_forgotten', 'iterations', 'thresholds',
+          'elapsed', 'nodes_per_second', 'heuristic_time', 'expansion_time', 'queue_time')
+
+# Values summed and values maximized by SearchStats.merge
+MERGED_COUNTERS = ('nodes_expanded', 'nodes_generated', 'duplicates_pruned', 'stale_dropped', 'nodes_forgotten',
+                   'heuristic_time', 'expansion_time', 'queue_time')
+MERGED_PEAKS = ('peak_open', 'peak_closed', 'peak_nodes')
+
+class SearchStats:
+    def __init__(self, algorithm, heuristic, profile=False, on_progress=None, progress_interval=PROGRESS_INTERVAL):
+        self.algorithm = algorithm
+        self.heuristic = heuristic
+        self.nodes_expanded = 0
+        self.nodes_generated = 0
+        self.duplicates_pruned = 0  # Children not pushed because their board was reached with a lower or equal g
+        self.stale_dropped = 0  # Open list entries dropped when popped because a better g was found later
+        self.peak_open = 0
+        self.peak_closed = 0  # Most boards held in the best-g (closed) table
+        self.peak_nodes = 0  # Memory bounded search: most nodes held at once
+        self.nodes_forgotten = 0  # Memory bounded search: leaves dropped to stay within the budget
+        self.iterations = 0  # IDA*: iterations run, anytime A*: weighted searches run
+        self.thresholds = []  # IDA*: threshold of every iteration
+        self.elapsed = 0.0
+
+        # Seconds spent in every phase, only measured with profile
+        self.profile = profile
+        self.heuristic_time = 0.0
+        self.expansion_time = 0.0
+        self.queue_time = 0.0
+
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        # Searches call progress() once nodes_expanded reaches next_progress
+        self.next_progress = progress_interval if on_progress is not None else float('inf')
+        self.start_time = time.perf_counter()
+        self.finished = False
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes_expanded / self.elapsed if self.elapsed > 0 else 0.0
+
+    def update_elapsed(self):
+        if not self.finished:
+            self.elapsed = time.perf_counter() - self.start_time
+
+    def progress(self):
+        self.update_elapsed()
+        while self.next_progress <= self.nodes_expanded:
+            self.next_progress += self.progress_interval
+        self.on_progress(self)
+
+    def finish(self):
+        self.update_elapsed()
+        self.finished = True
+
+    # Adds the counts of another search into these ones (a subtree searched by a worker): the
+    # counters and times are summed, the peaks keep the largest
+    def merge(self, other):
+        for field in MERGED_COUNTERS:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        for field in MERGED_PEAKS:
+            setattr(self, field, max(getattr(self, field), getattr(other, field)))
+
+    # Wraps an expansion function (returning or yielding the children) so the time spent in it,
+    # without the heuristic time measured meanwhile, goes to expansion_time
+    def time_expansion(self, function):
+        def timed_expansion(*args):
+            heuristic_time = self.heuristic_time
+            start = time.perf_counter()
+            result = function(*args)
+            if result is not None and not isinstance(result, (list, tuple)):
+                result = list(result)
+            self.expansion_time += time.perf_counter() - start - (self.heuristic_time - heuristic_time)
+            return result
+        return timed_expansion
+
+    # Wraps an open list operation so the time spent in it goes to queue_time
+    def time_queue(self, function):
+        def timed_queue(*args):
+            start = time.perf_counter()
+            result = function(*args)
+            self.queue_time += time.perf_counter() - start
+            return result
+        return timed_queue
+
+    def as_dict(self):
+        self.update_elapsed()
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def __repr__(self):
+        return f'SearchStats({self.as_dict()})'
+
+# Open list whose push and pop are timed into the queue_time of the stats
+class TimedOpenList:
+    def __init__(self, open_list, stats):
+        self.open_list = open_list
+        self.push = stats.time_queue(open_list.push)
+        self.pop = stats.time_queue(open_list.pop)
+        self.min_cost = stats.time_queue(open_list.min_cost)
+
+    def __len__(self):
+        return len(self.open_list)
+
+    def __iter__(self):
+        return iter(self.open_list)
@@ -0,0 +1,55 @@
+from array import array
+
+""" Fixed size transposition table for IDA*, storing the best depth reached by every board.
+
+Boards are identified by their 64-bit Zobrist hash (see core.get_zobrist_hash), which stands for
+the board: two boards sharing a hash would share an entry, so the hash has to be a full 64-bit
+one, never a folded one like the builtin hash() of the board key. """
+
+# Bytes taken by one slot: Zobrist hash, best depth and iteration stamp
+ENTRY_BYTES = 8 + 2 + 4
+
+REPLACEMENT_POLICIES = ('always', 'depth')
+
+class TranspositionTable:
+    def __init__(self, max_bytes, replacement='depth'):
+        if replacement not in REPLACEMENT_POLICIES:
+            raise ValueError(f'Invalid replacement policy: {replacement}, must be one of {REPLACEMENT_POLICIES}')
+        if max_bytes < ENTRY_BYTES:
+            raise ValueError(f'The transposition table needs at least {ENTRY_BYTES} bytes')
+
+        # Power of two number of slots so the slot is a mask of the hash
+        slots = 1
+        while slots * 2 * ENTRY_BYTES <= max_bytes:
+            slots *= 2
+        self.mask = slots - 1
+        self.replacement = replacement
+        self.hashes = array('Q', [0]) * slots
+        self.depths = array('H', [0]) * slots
+        self.stamps = array('I', [0]) * slots  # Iteration that wrote the slot, 0 when empty
+        self.iteration = 1
+
+    def __len__(self):
+        return len(self.hashes)
+
+    # Entries of previous iterations are ignored, so starting an iteration is O(1)
+    def new_iteration(self):
+        self.iteration += 1
+
+    # Returns True when the board was already reached at the same or a lower depth in this
+    # iteration (its subtree has been or is being searched with at least as much budget).
+    # Otherwise the depth is recorded according to the replacement policy
+    def should_prune(self, board_hash, depth):
+        slot = board_hash & self.mask
+        if self.stamps[slot] == self.iteration:
+            if self.hashes[slot] == board_hash:
+                if self.depths[slot] <= depth:
+                    return True
+                self.depths[slot] = depth
+                return False
+            if self.replacement == 'depth' and self.depths[slot] <= depth:
+                return False
+        self.hashes[slot] = board_hash
+        self.depths[slot] = depth
+        self.stamps[slot] = self.iteration
+        return False